@@ -0,0 +1,2 @@
+ALTER TABLE pump_tokens 
+ADD COLUMN creation_time_error_seconds double precision;
@@ -0,0 +1,4 @@
+ALTER TABLE pump_tokens 
+ADD COLUMN holder_growth_per_min double precision,
+ADD COLUMN market_cap_velocity double precision,
+ADD COLUMN liquidity_drawdown double precision;
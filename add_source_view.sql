@@ -0,0 +1,5 @@
+ALTER TABLE pump_tokens 
+ADD COLUMN source_view text;
+
+ALTER TABLE pump_token_snapshots 
+ADD COLUMN source_view text;
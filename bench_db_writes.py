@@ -0,0 +1,375 @@
+import argparse
+import io
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+import psycopg2
+from psycopg2.extensions import parse_dsn
+from psycopg2.extras import execute_values
+from dotenv import load_dotenv
+from gmgn import insert_or_update_token
+from synthetic_records import make_record, mutate_records
+
+# Throwaway schema the benchmark creates, writes into and drops again
+BENCH_SCHEMA = 'write_bench'
+
+# The benchmark only runs against a Postgres on this machine
+LOCAL_HOSTS = {'', 'localhost', '127.0.0.1', '::1'}
+
+# Current shape of the scraper's tables with every migration applied; also used
+# by check_failover.py to set up a scratch database
+TABLES_SQL = '''
+CREATE TABLE IF NOT EXISTS pump_tokens (
+    contract_address text PRIMARY KEY,
+    token_symbol text,
+    price text,
+    liquidity text,
+    holders text,
+    transactions text,
+    volume text,
+    change_1m text,
+    change_5m text,
+    change_1h text,
+    sol_data text,
+    percent_change text,
+    market_cap text,
+    nomint text,
+    blacklist text,
+    burnt text,
+    top10_percentage text,
+    insiders_percentage text,
+    dev text,
+    source_view text,
+    created_at timestamp,
+    updated_at timestamp,
+    token_creation_time timestamp,
+    creation_time_error_seconds double precision,
+    holder_growth_per_min double precision,
+    market_cap_velocity double precision,
+    liquidity_drawdown double precision
+);
+
+CREATE TABLE IF NOT EXISTS pump_token_snapshots (
+    contract_address text NOT NULL,
+    captured_at timestamp NOT NULL,
+    price text,
+    market_cap text,
+    liquidity text,
+    holders text,
+    volume text,
+    source_view text
+);
+
+CREATE TABLE IF NOT EXISTS token_rollups (
+    contract_address text NOT NULL,
+    resolution text NOT NULL,
+    bucket_start timestamp NOT NULL,
+    open_price double precision,
+    high_price double precision,
+    low_price double precision,
+    close_price double precision,
+    volume_open double precision,
+    volume_close double precision,
+    holders_open double precision,
+    holders_close double precision,
+    samples integer NOT NULL,
+    PRIMARY KEY (contract_address, resolution, bucket_start)
+);
+'''
+
+SCHEMA_SQL = f'''
+DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE;
+CREATE SCHEMA {BENCH_SCHEMA};
+SET search_path TO {BENCH_SCHEMA};
+''' + TABLES_SQL
+
+# Record fields in pump_tokens column order
+TOKEN_FIELDS = [
+    ('contract_address', 'contractAddress'),
+    ('token_symbol', 'tokenSymbol'),
+    ('price', 'price'),
+    ('liquidity', 'liquidity'),
+    ('holders', 'holders'),
+    ('transactions', 'transactions'),
+    ('volume', 'volume'),
+    ('change_1m', 'change1m'),
+    ('change_5m', 'change5m'),
+    ('change_1h', 'change1h'),
+    ('sol_data', 'solData'),
+    ('percent_change', 'percentChange'),
+    ('market_cap', 'marketCap'),
+    ('nomint', 'nomint'),
+    ('blacklist', 'blacklist'),
+    ('burnt', 'burnt'),
+    ('top10_percentage', 'top10Percentage'),
+    ('insiders_percentage', 'insidersPercentage'),
+    ('dev', 'dev'),
+]
+
+UPSERT_SQL = '''
+INSERT INTO pump_tokens ({columns}, created_at, updated_at)
+VALUES %s
+ON CONFLICT (contract_address) DO UPDATE SET
+{updates},
+    updated_at = EXCLUDED.updated_at
+'''.format(
+    columns=', '.join(column for column, _ in TOKEN_FIELDS),
+    updates=',\n'.join(f'    {column} = EXCLUDED.{column}' for column, _ in TOKEN_FIELDS[1:])
+)
+
+SNAPSHOT_COLUMNS = ['contractAddress', 'price', 'marketCap', 'liquidity', 'holders', 'volume']
+
+def token_row(record, now):
+    """Tuple of pump_tokens values for a record"""
+    return tuple(record[key] for _, key in TOKEN_FIELDS) + (now, now)
+
+class RowByRowWriter:
+    """The current path: gmgn.insert_or_update_token() for each record"""
+    name = 'row_by_row'
+
+    def write(self, conn, records, now, timings):
+        for record in records:
+            started = time.perf_counter()
+            insert_or_update_token(conn, record)
+            timings.append(time.perf_counter() - started)
+        return len(records)
+
+class BatchedUpsertWriter:
+    """One multi-row INSERT ... ON CONFLICT and one commit per batch"""
+    name = 'batched_upsert'
+
+    def __init__(self, batch_size=1000):
+        self.batch_size = batch_size
+
+    def write_rows(self, conn, rows, timings):
+        cursor = conn.cursor()
+        for start in range(0, len(rows), self.batch_size):
+            started = time.perf_counter()
+            execute_values(cursor, UPSERT_SQL, rows[start:start + self.batch_size],
+                           page_size=self.batch_size)
+            conn.commit()
+            timings.append(time.perf_counter() - started)
+        return len(rows)
+
+    def write(self, conn, records, now, timings):
+        return self.write_rows(conn, [token_row(record, now) for record in records], timings)
+
+class DeltaOnlyWriter(BatchedUpsertWriter):
+    """Batched upsert that skips records identical to what was last written"""
+    name = 'delta_only'
+
+    def __init__(self, batch_size=1000):
+        super().__init__(batch_size)
+        self.last_written = {}
+
+    def write(self, conn, records, now, timings):
+        rows = []
+        for record in records:
+            values = tuple(record[key] for _, key in TOKEN_FIELDS)
+            if self.last_written.get(record['contractAddress']) != values:
+                self.last_written[record['contractAddress']] = values
+                rows.append(values + (now, now))
+        return self.write_rows(conn, rows, timings)
+
+class CopyHistoryWriter:
+    """COPY each snapshot into the append-only pump_token_snapshots table"""
+    name = 'copy_history'
+
+    def __init__(self, batch_size=10000):
+        self.batch_size = batch_size
+
+    def write(self, conn, records, now, timings):
+        cursor = conn.cursor()
+        captured = now.isoformat(sep=' ')
+        for start in range(0, len(records), self.batch_size):
+            buffer = io.StringIO()
+            for record in records[start:start + self.batch_size]:
+                fields = [record[key] for key in SNAPSHOT_COLUMNS]
+                fields.insert(1, captured)
+                buffer.write('\t'.join(field.replace('\t', ' ') for field in fields) + '\n')
+            buffer.seek(0)
+
+            started = time.perf_counter()
+            cursor.copy_expert(
+                'COPY pump_token_snapshots (contract_address, captured_at, price, '
+                'market_cap, liquidity, holders, volume) FROM STDIN', buffer)
+            conn.commit()
+            timings.append(time.perf_counter() - started)
+        return len(records)
+
+WRITERS = {
+    'row_by_row': RowByRowWriter,
+    'batched_upsert': BatchedUpsertWriter,
+    'copy_history': CopyHistoryWriter,
+    'delta_only': DeltaOnlyWriter,
+}
+
+def bench_dsn(dsn=None):
+    """Build the benchmark DSN from --dsn or BENCH_DB_*; the scraper's DB_* settings are never used"""
+    if dsn:
+        return dsn
+
+    if not os.getenv("BENCH_DB_NAME"):
+        return None
+    return psycopg2.extensions.make_dsn(
+        dbname=os.getenv("BENCH_DB_NAME"),
+        user=os.getenv("BENCH_DB_USER", "postgres"),
+        password=os.getenv("BENCH_DB_PASSWORD", ""),
+        host=os.getenv("BENCH_DB_HOST", "localhost"),
+        port=os.getenv("BENCH_DB_PORT", "5432")
+    )
+
+def is_local_host(host):
+    """True for loopback addresses and Unix sockets (every host in a multi-host list)"""
+    return all(h.strip() in LOCAL_HOSTS or h.strip().startswith('/') for h in (host or '').split(','))
+
+def connect_bench_database(dsn):
+    """Connect to the scratch database, refusing anything that is not a local non-scraper database"""
+    params = parse_dsn(dsn)
+    if not is_local_host(params.get('host')):
+        raise ValueError(f"Refusing to benchmark against non-local host {params.get('host')!r}")
+    if params.get('dbname') and params.get('dbname') == os.getenv("DB_NAME"):
+        raise ValueError(f"Refusing to benchmark against the scraper's database {params['dbname']!r}")
+
+    conn = psycopg2.connect(dsn)
+    # Re-check what libpq actually connected to (e.g. PGHOST from the environment)
+    if not is_local_host(conn.info.host):
+        conn.close()
+        raise ValueError(f"Refusing to benchmark against non-local host {conn.info.host!r}")
+    return conn
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+def wal_lsn(cursor):
+    cursor.execute("SELECT pg_current_wal_lsn()")
+    return cursor.fetchone()[0]
+
+def table_stats(cursor):
+    """Live/dead tuples and on-disk size of the benchmark tables"""
+    cursor.execute('''
+    SELECT relname, n_live_tup, n_dead_tup, pg_total_relation_size(relid)
+    FROM pg_stat_user_tables
+    WHERE schemaname = %s
+    ''', (BENCH_SCHEMA,))
+    return {
+        name: {'live_tuples': live, 'dead_tuples': dead, 'bytes': size}
+        for name, live, dead, size in cursor.fetchall()
+    }
+
+def run_phase(conn, writer, records, now):
+    """Write one snapshot and measure throughput, commit latency and WAL volume"""
+    cursor = conn.cursor()
+    start_lsn = wal_lsn(cursor)
+    conn.commit()
+
+    timings = []
+    started = time.perf_counter()
+    rows = writer.write(conn, records, now, timings)
+    elapsed = time.perf_counter() - started
+
+    cursor.execute("SELECT pg_wal_lsn_diff(pg_current_wal_lsn(), %s)", (start_lsn,))
+    wal_bytes = int(cursor.fetchone()[0])
+    conn.commit()
+
+    return {
+        'records': len(records),
+        'rows_written': rows,
+        'seconds': round(elapsed, 4),
+        'rows_per_sec': round(len(records) / elapsed, 1) if elapsed > 0 else None,
+        'commits': len(timings),
+        'commit_p50_ms': round(percentile(timings, 0.50) * 1000, 3) if timings else None,
+        'commit_p99_ms': round(percentile(timings, 0.99) * 1000, 3) if timings else None,
+        'wal_bytes': wal_bytes,
+    }
+
+def run_benchmark(conn, strategy, size, change_ratio, seed):
+    """Run an insert pass and an update pass of one strategy at one size"""
+    cursor = conn.cursor()
+    cursor.execute(SCHEMA_SQL)
+    conn.commit()
+
+    rng = random.Random(seed)
+    first = [make_record(rng, i) for i in range(size)]
+    second = mutate_records(rng, first, change_ratio)
+    now = datetime.utcnow()
+
+    writer = WRITERS[strategy]()
+    result = {
+        'strategy': strategy,
+        'size': size,
+        'change_ratio': change_ratio,
+        'started_at': now.strftime("%Y-%m-%d %H:%M:%S UTC"),
+        'insert': run_phase(conn, writer, first, now),
+        'update': run_phase(conn, writer, second, now + timedelta(seconds=60)),
+    }
+
+    # Table statistics are reported asynchronously, so flush them before reading
+    if conn.server_version >= 150000:
+        cursor.execute("SELECT pg_stat_force_next_flush()")
+    time.sleep(0.5)
+    result['tables'] = table_stats(cursor)
+    conn.commit()
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark pump_tokens write strategies against a scratch Postgres",
+        epilog="The target must be a local throwaway database given with --dsn or BENCH_DB_NAME "
+               "(plus optional BENCH_DB_USER/PASSWORD/HOST/PORT); it gets a write_bench schema "
+               "that is dropped afterwards."
+    )
+    parser.add_argument('--dsn', default=None,
+                        help="libpq connection string of the scratch database")
+    parser.add_argument('--sizes', default='100,1000,10000,100000',
+                        help="comma-separated snapshot sizes")
+    parser.add_argument('--strategies', default=','.join(WRITERS),
+                        help="comma-separated strategies to run")
+    parser.add_argument('--change-ratio', type=float, default=0.3,
+                        help="fraction of tokens that change between snapshots")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default='bench_output.txt',
+                        help="file to append JSON result lines to")
+    args = parser.parse_args()
+
+    # Loaded only so BENCH_DB_* can live in .env and DB_NAME can be refused
+    load_dotenv()
+    dsn = bench_dsn(args.dsn)
+    if not dsn:
+        print("No benchmark database given: pass --dsn or set BENCH_DB_NAME")
+        sys.exit(1)
+    try:
+        conn = connect_bench_database(dsn)
+    except ValueError as e:
+        print(e)
+        sys.exit(1)
+
+    try:
+        for size in [int(size) for size in args.sizes.split(',')]:
+            for strategy in args.strategies.split(','):
+                result = run_benchmark(conn, strategy, size, args.change_ratio, args.seed)
+                print(f"{strategy:<15} {size:>7} rows: "
+                      f"insert {result['insert']['rows_per_sec']} rows/s "
+                      f"(p50 {result['insert']['commit_p50_ms']} ms, p99 {result['insert']['commit_p99_ms']} ms, "
+                      f"WAL {result['insert']['wal_bytes']} B), "
+                      f"update {result['update']['rows_per_sec']} rows/s "
+                      f"(p50 {result['update']['commit_p50_ms']} ms, p99 {result['update']['commit_p99_ms']} ms, "
+                      f"WAL {result['update']['wal_bytes']} B)")
+                with open(args.output, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(result) + '\n')
+    finally:
+        conn.rollback()
+        cursor = conn.cursor()
+        cursor.execute(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE")
+        conn.commit()
+        conn.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,281 @@
+import argparse
+import os
+import queue
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from urllib.request import urlopen
+from dotenv import dotenv_values
+from playwright.sync_api import sync_playwright
+from bench_db_writes import TABLES_SQL
+from gmgn import setup_database
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+def free_port():
+    """Ask the OS for a TCP port nothing is listening on"""
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def wait_for_url(url, timeout):
+    """Poll url until it answers, so dependants don't start before it is up"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urlopen(url, timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+class ScraperInstance:
+    """One gmgn.py process with its own headless Chrome, scratch checkpoint and working directory.
+
+    Its output is echoed with --verbose, ready is set once it stands by for
+    the lease, and the moment it reports winning the lease is put on the
+    shared events queue.
+    """
+
+    def __init__(self, name, chrome_path, sim_url, db_name, lease_name, events, verbose=False):
+        self.name = name
+        self.ready = threading.Event()
+        self.workdir = tempfile.mkdtemp(prefix=f"gmgn_failover_{name}_")
+        cdp_port = free_port()
+
+        self.chrome = subprocess.Popen([
+            chrome_path,
+            '--headless=new',
+            f'--remote-debugging-port={cdp_port}',
+            f'--user-data-dir={os.path.join(self.workdir, "chrome-profile")}',
+            '--no-first-run',
+            '--no-default-browser-check',
+            '--no-sandbox',
+            'about:blank',
+        ], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            wait_for_url(f"http://127.0.0.1:{cdp_port}/json/version", 30)
+        except RuntimeError:
+            self.chrome.kill()
+            self.chrome.wait()
+            shutil.rmtree(self.workdir, ignore_errors=True)
+            raise
+
+        env = dict(os.environ)
+        env.update({
+            'CDP_URL': f"http://127.0.0.1:{cdp_port}",
+            'GMGN_URL': sim_url,
+            'LEADER_ELECTION': '1',
+            'LEASE_NAME': lease_name,
+            'DB_NAME': db_name,
+            'CHECKPOINT_PATH': os.path.join(self.workdir, 'state.ckpt.gz'),
+            'PYTHONUNBUFFERED': '1',
+        })
+        # Screenshots and debug dumps land in the instance's own directory
+        self.scraper = subprocess.Popen(
+            [sys.executable, os.path.join(HERE, 'gmgn.py')],
+            cwd=self.workdir,
+            env=env,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True
+        )
+
+        def forward():
+            for line in self.scraper.stdout:
+                if verbose:
+                    print(f"[{self.name}] {line}", end='')
+                if line.startswith('Standing by for leadership lease'):
+                    self.ready.set()
+                if line.startswith('Acquired leadership lease'):
+                    # Wall-clock time for reporting, naive UTC to compare with updated_at
+                    events.put((self, time.time(), datetime.utcnow()))
+
+        threading.Thread(target=forward, daemon=True).start()
+
+    def kill_scraper(self):
+        self.scraper.send_signal(signal.SIGKILL)
+
+    def kill_chrome(self):
+        self.chrome.send_signal(signal.SIGKILL)
+
+    def stop(self):
+        for process in (self.scraper, self.chrome):
+            if process.poll() is None:
+                process.kill()
+            process.wait()
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+def prepare_database(db_name):
+    """Create the scraper's tables in the scratch database if they are missing"""
+    conn = setup_database(db_name)
+    cursor = conn.cursor()
+    cursor.execute(TABLES_SQL)
+    conn.commit()
+    return conn
+
+def wait_for_commit(conn, after, timeout):
+    """Wall-clock time of the first pump_tokens write stamped later than after, or None"""
+    deadline = time.monotonic() + timeout
+    cursor = conn.cursor()
+    while time.monotonic() < deadline:
+        cursor.execute("SELECT 1 FROM pump_tokens WHERE updated_at > %s LIMIT 1", (after,))
+        found = cursor.fetchone()
+        conn.commit()
+        if found:
+            return time.time()
+        time.sleep(0.2)
+    return None
+
+def wait_for_standbys(pool, leader, timeout):
+    """Block until every instance but the leader has loaded its page and is standing by"""
+    for instance in pool:
+        if instance is not leader and not instance.ready.wait(timeout):
+            raise RuntimeError(f"{instance.name} did not stand by within {timeout}s")
+
+def check_failover(db_name, instances=2, rounds=4, scenario='both', chrome_path=None,
+                   lease_name='gmgn_failover_check', timeout=120, verbose=False):
+    """Repeatedly kill the leading scraper (or its Chrome) and time until a standby commits again"""
+    conn = prepare_database(db_name)
+    if chrome_path is None:
+        with sync_playwright() as p:
+            chrome_path = p.chromium.executable_path
+
+    sim_port = free_port()
+    sim = subprocess.Popen(
+        [sys.executable, os.path.join(HERE, 'gmgn_sim.py'), '--port', str(sim_port), '--seed', '1'],
+        stdout=subprocess.DEVNULL
+    )
+    sim_url = f"http://127.0.0.1:{sim_port}/"
+
+    events = queue.Queue()
+    pool = []
+    results = []
+    counter = 0
+
+    def add_instance():
+        nonlocal counter
+        counter += 1
+        instance = ScraperInstance(f"scraper{counter}", chrome_path, sim_url, db_name,
+                                   lease_name, events, verbose)
+        pool.append(instance)
+
+    try:
+        wait_for_url(sim_url, 30)
+        started_at = datetime.utcnow()
+        for _ in range(instances):
+            add_instance()
+
+        leader, _, _ = events.get(timeout=timeout)
+        if wait_for_commit(conn, started_at, timeout) is None:
+            print(f"Initial leader {leader.name} did not commit within {timeout}s")
+            return None
+        print(f"Initial leader: {leader.name}")
+        wait_for_standbys(pool, leader, timeout)
+
+        for round_number in range(1, rounds + 1):
+            if scenario == 'both':
+                kind = 'process' if round_number % 2 else 'chrome'
+            else:
+                kind = scenario
+
+            # Only elections after this kill count
+            while not events.empty():
+                events.get_nowait()
+
+            killed_wall = time.time()
+            if kind == 'process':
+                leader.kill_scraper()
+            else:
+                leader.kill_chrome()
+
+            # Wait for a standby to win the lease first: until then the old leader may
+            # still commit (it only notices a dead browser on its next page call), and
+            # those writes must not be timed as the new leader's
+            elected = events.get(timeout=timeout)
+            committed = wait_for_commit(conn, elected[2], timeout)
+            if committed is None:
+                print(f"Round {round_number} ({kind} kill): {elected[0].name} was elected "
+                      f"but did not commit within {timeout}s")
+                return None
+
+            if kind == 'chrome':
+                # The old leader should have released the lease and exited by itself
+                try:
+                    leader.scraper.wait(timeout=10)
+                    print(f"  {leader.name} exited after losing its browser")
+                except subprocess.TimeoutExpired:
+                    print(f"  {leader.name} was still running after losing its browser")
+
+            results.append({
+                'kind': kind,
+                'elected_s': elected[1] - killed_wall,
+                'first_commit_s': committed - killed_wall,
+            })
+            print(f"Round {round_number} ({kind} kill): {elected[0].name} elected after "
+                  f"{results[-1]['elected_s']:.2f}s, first commit after {results[-1]['first_commit_s']:.2f}s")
+
+            # Keep the pool at full size so every round has the same number of standbys
+            pool.remove(leader)
+            leader.stop()
+            add_instance()
+            leader = elected[0]
+            wait_for_standbys(pool, leader, timeout)
+    except queue.Empty:
+        print(f"No leader elected within {timeout}s")
+        return None
+    finally:
+        for instance in pool:
+            instance.stop()
+        sim.kill()
+        sim.wait()
+        conn.close()
+
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure scraper failover by killing the leading gmgn.py or its Chrome")
+    parser.add_argument('--db-name', default=os.getenv("FAILOVER_DB_NAME"),
+                        help="scratch database the scrapers write to (or FAILOVER_DB_NAME); "
+                             "must differ from DB_NAME in .env")
+    parser.add_argument('--instances', type=int, default=2)
+    parser.add_argument('--rounds', type=int, default=4)
+    parser.add_argument('--scenario', choices=['process', 'chrome', 'both'], default='both',
+                        help="kill the scraper process, its Chrome, or alternate between the two")
+    parser.add_argument('--max-seconds', type=float, default=15.0,
+                        help="fail if any kill-to-first-commit takes longer than this")
+    parser.add_argument('--chrome', default=None,
+                        help="Chrome/Chromium executable to run per instance (default: Playwright's Chromium)")
+    parser.add_argument('--verbose', action='store_true', help="echo every scraper's output")
+    args = parser.parse_args()
+
+    if not args.db_name:
+        parser.error("--db-name (or FAILOVER_DB_NAME) is required")
+    if args.db_name == dotenv_values().get("DB_NAME"):
+        print(f"Refusing to run against {args.db_name}: it is the DB_NAME configured in .env")
+        sys.exit(1)
+
+    results = check_failover(args.db_name, args.instances, args.rounds, args.scenario,
+                             chrome_path=args.chrome, verbose=args.verbose)
+    if not results:
+        sys.exit(1)
+
+    for kind in ('process', 'chrome'):
+        times = [r['first_commit_s'] for r in results if r['kind'] == kind]
+        if times:
+            print(f"{kind} kill to first commit: min {min(times):.2f}s, "
+                  f"avg {sum(times) / len(times):.2f}s, max {max(times):.2f}s")
+    worst = max(r['first_commit_s'] for r in results)
+    if worst > args.max_seconds:
+        print(f"FAILED: failover exceeded {args.max_seconds}s")
+        sys.exit(1)
+    print("OK")
+
+if __name__ == "__main__":
+    main()
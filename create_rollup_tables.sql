@@ -0,0 +1,27 @@
+CREATE TABLE IF NOT EXISTS pump_token_snapshots (
+    contract_address text NOT NULL,
+    captured_at timestamp NOT NULL,
+    price text,
+    market_cap text,
+    liquidity text,
+    holders text,
+    volume text
+);
+
+CREATE INDEX IF NOT EXISTS pump_token_snapshots_captured_at_idx
+    ON pump_token_snapshots (captured_at);
+
+CREATE TABLE IF NOT EXISTS token_rollups (
+    contract_address text NOT NULL,
+    resolution text NOT NULL,
+    bucket_start timestamp NOT NULL,
+    open_price double precision,
+    high_price double precision,
+    low_price double precision,
+    close_price double precision,
+    volume double precision,
+    holders_open double precision,
+    holders_close double precision,
+    samples integer NOT NULL,
+    PRIMARY KEY (contract_address, resolution, bucket_start)
+);
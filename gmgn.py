@@ -4,16 +4,55 @@ import json
 from datetime import datetime, timedelta
 import psycopg2
 import os
+import math
+import signal
 from dotenv import load_dotenv
+from psycopg2.extras import execute_values
+from token_metrics import TokenMetricsStore
+from token_rollups import RollupStore
+from token_ages import EPOCH, CreationTimeTracker, creation_bounds, epoch_seconds
+from scraper_checkpoint import Checkpointer, database_identity, load_checkpoint
+from leader_election import AdvisoryLockLease, FencedConnection, LeaseLostError, DEFAULT_LEASE_NAME
 
-def setup_database():
+# Solana new pairs with the default filter set; GMGN_URL overrides it (e.g. to point at gmgn_sim.py)
+GMGN_URL = os.getenv("GMGN_URL", "https://gmgn.ai/new-pair?chain=sol&rd=0&ppa=0&ms=0&fb=0&bp=0&or=0&mo=0&ry=0&0ren=1&0fr=1&0mihc=50&0ihc=1&0mish=50&0ish=1&0miv=5&0iv=1&0mac=30m&0mim=5&0im=1&0mahc=0&0mair=20&0iir=1&0miir=0&0mam=25")
+
+class ExtractionTimeout(Exception):
+    """Raised when a call into the page does not return in time, e.g. because Chrome hung"""
+
+def call_with_timeout(seconds, func, *args):
+    """Run func(*args), raising ExtractionTimeout after seconds; only usable from the main thread"""
+    def on_alarm(signum, frame):
+        raise ExtractionTimeout(f"{func.__name__} did not return within {seconds}s")
+    
+    previous = signal.signal(signal.SIGALRM, on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        return func(*args)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+def wait_while_leading(page, browser, lease, seconds):
+    """Wait between cycles; returns False early if the lease is lost, raises if the browser goes away"""
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        # Waiting through Playwright keeps its event loop running, so a browser crash is noticed right away
+        page.wait_for_timeout(min(lease.poll_seconds, max(deadline - time.monotonic(), 0)) * 1000)
+        if not browser.is_connected():
+            raise RuntimeError("Browser disconnected")
+        if not lease.still_held():
+            return False
+    return True
+
+def setup_database(dbname=None):
     """Set up the PostgreSQL database connection using environment variables"""
     # Load environment variables from .env file
     load_dotenv()
     
-    # Get database connection details from environment variables
+    # Get database connection details from environment variables; dbname overrides DB_NAME
     conn = psycopg2.connect(
-        dbname=os.getenv("DB_NAME", "postgres"),
+        dbname=dbname or os.getenv("DB_NAME", "postgres"),
         user=os.getenv("DB_USER", "postgres"),
         password=os.getenv("DB_PASSWORD", ""),
         host=os.getenv("DB_HOST", "localhost"),
@@ -21,45 +60,52 @@ def setup_database():
     )
     return conn
 
-def calculate_token_creation_time(age_text):
-    """Calculate token creation time from age text (e.g., '30s', '5m', '1h')"""
+def calculate_token_creation_time(age_text, captured_at=None):
+    """Calculate token creation time and its error bound in seconds from age text (e.g., '30s', '5m', '1h 5m', '1d')"""
     if not age_text:
-        return None
-        
-    try:
-        # Convert age text to seconds
-        seconds = 0
-        if 'm' in age_text:
-            seconds = int(age_text.replace('m', '')) * 60
-        elif 's' in age_text:
-            seconds = int(age_text.replace('s', ''))
-        elif 'h' in age_text:
-            seconds = int(age_text.replace('h', '')) * 3600
-        
-        if seconds > 0:
-            # Calculate creation time in UTC
-            creation_time = datetime.utcnow() - timedelta(seconds=seconds)
-            return creation_time
-        
-    except Exception as e:
-        print(f"Error parsing age data '{age_text}': {e}")
+        return None, None
     
-    return None
+    # Anchor to when the snapshot was taken, not when this row is processed
+    if captured_at is None:
+        captured_at = datetime.utcnow()
+    
+    earliest, latest = creation_bounds([age_text], captured_at)
+    if math.isnan(earliest[0]):
+        print(f"Error parsing age data '{age_text}'")
+        return None, None
+    
+    error_seconds = (latest[0] - earliest[0]) / 2
+    creation_time = EPOCH + timedelta(seconds=float(earliest[0] + error_seconds))
+    return creation_time, float(error_seconds)
 
-def insert_or_update_token(conn, token_data):
+def normalize_contract_address(contract, display):
+    """Restore the 'ump' suffix when the displayed address shows it but the link does not"""
+    if display and display.endswith("...ump") and contract and not contract.endswith("ump"):
+        return contract + "ump"
+    return contract
+
+def insert_or_update_token(conn, token_data, known_exists=False):
     """Insert a new token record or update if contract address already exists"""
     cursor = conn.cursor()
     
-    # Check if token already exists
-    cursor.execute("SELECT contract_address FROM pump_tokens WHERE contract_address = %s", 
-                  (token_data['contractAddress'],))
-    exists = cursor.fetchone()
+    if known_exists:
+        # Already written by this scraper, no need to look it up
+        exists = (token_data['contractAddress'],)
+    else:
+        # Check if token already exists
+        cursor.execute("SELECT contract_address FROM pump_tokens WHERE contract_address = %s", 
+                      (token_data['contractAddress'],))
+        exists = cursor.fetchone()
     
     # Use UTC timestamps
     current_time = datetime.utcnow()
     
-    # Calculate token creation time from age
-    token_creation_time = calculate_token_creation_time(token_data['age'])
+    # Prefer the converged estimate from the creation-time tracker when available
+    if token_data.get('tokenCreationTime'):
+        token_creation_time = token_data['tokenCreationTime']
+        creation_time_error = token_data['creationTimeError']
+    else:
+        token_creation_time, creation_time_error = calculate_token_creation_time(token_data['age'])
     
     if exists:
         # Update existing record
@@ -83,6 +129,7 @@ def insert_or_update_token(conn, token_data):
             top10_percentage = %s,
             insiders_percentage = %s,
             dev = %s,
+            source_view = %s,
             updated_at = %s
         WHERE contract_address = %s
         ''', (
@@ -104,23 +151,36 @@ def insert_or_update_token(conn, token_data):
             token_data['top10Percentage'],
             token_data['insidersPercentage'],
             token_data['dev'],
+            token_data.get('sourceView'),
             current_time,
             token_data['contractAddress']
         ))
         
-        # Only update token_creation_time if we can calculate it and it's not already set
-        if token_creation_time:
+        if cursor.rowcount == 0:
+            # Row was deleted since we last wrote it, so insert it again below
+            exists = None
+        # Only update token_creation_time if the new estimate is at least as tight as the stored one,
+        # or if the two windows don't overlap: like CreationTimeTracker, treat the stored one as wrong then
+        elif token_creation_time:
             cursor.execute('''
             UPDATE pump_tokens 
-            SET token_creation_time = %s 
+            SET token_creation_time = %s,
+                creation_time_error_seconds = %s
             WHERE contract_address = %s 
-            AND (token_creation_time IS NULL OR token_creation_time > %s)
+            AND (token_creation_time IS NULL
+                 OR creation_time_error_seconds IS NULL
+                 OR creation_time_error_seconds >= %s
+                 OR ABS(EXTRACT(EPOCH FROM token_creation_time - %s)) > creation_time_error_seconds + %s)
             ''', (
                 token_creation_time,
+                creation_time_error,
                 token_data['contractAddress'],
-                token_creation_time
+                creation_time_error,
+                token_creation_time,
+                creation_time_error
             ))
-    else:
+    
+    if not exists:
         # Insert new record
         cursor.execute('''
         INSERT INTO pump_tokens (
@@ -143,10 +203,12 @@ def insert_or_update_token(conn, token_data):
             top10_percentage,
             insiders_percentage,
             dev,
+            source_view,
             created_at,
             updated_at,
-            token_creation_time
-        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            token_creation_time,
+            creation_time_error_seconds
+        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
         ''', (
             token_data['contractAddress'],
             token_data['tokenSymbol'],
@@ -167,14 +229,90 @@ def insert_or_update_token(conn, token_data):
             token_data['top10Percentage'],
             token_data['insidersPercentage'],
             token_data['dev'],
+            token_data.get('sourceView'),
             current_time,
             current_time,
-            token_creation_time
+            token_creation_time,
+            creation_time_error
         ))
     
     conn.commit()
     return exists is not None
 
+def update_token_metrics(conn, metrics):
+    """Write the derived rolling metrics next to each token's scraped columns"""
+    if not metrics:
+        return
+
+    rows = [
+        (
+            contract_address,
+            values['holder_growth_per_min'],
+            values['market_cap_velocity'],
+            values['liquidity_drawdown']
+        )
+        for contract_address, values in metrics.items()
+    ]
+    cursor = conn.cursor()
+    # One UPDATE ... FROM (VALUES ...) for the whole snapshot instead of one per token
+    execute_values(cursor, '''
+    UPDATE pump_tokens AS t SET
+        holder_growth_per_min = m.holder_growth_per_min,
+        market_cap_velocity = m.market_cap_velocity,
+        liquidity_drawdown = m.liquidity_drawdown
+    FROM (VALUES %s) AS m (contract_address, holder_growth_per_min, market_cap_velocity, liquidity_drawdown)
+    WHERE t.contract_address = m.contract_address
+    ''', rows,
+        template="(%s, %s::double precision, %s::double precision, %s::double precision)",
+        page_size=len(rows))
+    conn.commit()
+
+def touch_tokens(conn, contract_addresses):
+    """Refresh updated_at for tokens that were seen again but whose values did not change"""
+    if not contract_addresses:
+        return
+
+    cursor = conn.cursor()
+    cursor.execute('''
+    UPDATE pump_tokens SET updated_at = %s
+    WHERE contract_address = ANY(%s)
+    ''', (datetime.utcnow(), list(contract_addresses)))
+    conn.commit()
+
+def store_snapshot(conn, records, captured_at):
+    """Append the raw snapshot to the history table used to rebuild rollups"""
+    rows = [
+        (
+            record['contractAddress'],
+            captured_at,
+            record['price'],
+            record['marketCap'],
+            record['liquidity'],
+            record['holders'],
+            record['volume'],
+            record.get('sourceView')
+        )
+        for record in records
+        if record['contractAddress']
+    ]
+    if not rows:
+        return
+
+    cursor = conn.cursor()
+    execute_values(cursor, '''
+    INSERT INTO pump_token_snapshots (
+        contract_address,
+        captured_at,
+        price,
+        market_cap,
+        liquidity,
+        holders,
+        volume,
+        source_view
+    ) VALUES %s
+    ''', rows)
+    conn.commit()
+
 def store_age_data(conn, token_symbol, age_text):
     """Store the age data in a separate format for analysis"""
     try:
@@ -201,19 +339,463 @@ def store_age_data(conn, token_symbol, age_text):
     
     return None
 
+# Walks the gmgn token table DOM and returns one record per row
+EXTRACT_RECORDS_JS = '''
+() => {
+    try {
+        // The table structure on gmgn.ai has rows with data-row-key attributes
+        const tokenRows = Array.from(document.querySelectorAll('.g-table-row'));
+        if (tokenRows.length === 0) {
+            console.log("No token rows found using .g-table-row selector");
+        }
+
+        return tokenRows.map(row => {
+            // Get the full contract address from the row link
+            let fullContractAddress = "";
+            const tokenLinkElement = row.querySelector('a.css-1ahnstt');
+            if (tokenLinkElement && tokenLinkElement.getAttribute('href')) {
+                const href = tokenLinkElement.getAttribute('href');
+                // Format is usually /sol/token/mintAddress
+                const parts = href.split('/');
+                if (parts.length > 0) {
+                    fullContractAddress = parts[parts.length - 1];
+                }
+            }
+
+            // Extract token symbol - usually in a div with title attribute or bold text
+            let tokenSymbol = "";
+            const tokenNameElement = row.querySelector('.css-9enbzl');
+            if (tokenNameElement) {
+                tokenSymbol = tokenNameElement.textContent.trim();
+            }
+
+            // Extract time/age
+            let age = "";
+            const ageElement = row.querySelector('.g-table-cell:nth-child(2)');
+            if (ageElement) {
+                age = ageElement.textContent.trim();
+            }
+
+            // Extract SOL data
+            let solData = "";
+            let percentChange = "";
+            const solElement = row.querySelector('.css-1ubmcdg');
+            if (solElement) {
+                // Get the SOL value
+                const solValue = solElement.textContent.trim();
+                const solMatch = solValue.match(/SOL\\s*([\\d.]+)\\/0\\.015/);
+                if (solMatch) {
+                    solData = "SOL " + solMatch[1] + "/0.015";
+                }
+
+                // Get the percent change
+                const percentElement = solElement.querySelector('.css-ix4bfh');
+                if (percentElement) {
+                    percentChange = percentElement.textContent.trim();
+                }
+            }
+
+            // Extract liquidity
+            let liquidity = "";
+            const liquidityElement = row.querySelector('.g-table-cell:nth-child(4) .chakra-text');
+            if (liquidityElement) {
+                liquidity = liquidityElement.textContent.trim();
+            }
+
+            // Extract market cap (MC): shown below liquidity in the same cell
+            let marketCap = "";
+            const liqMcElements = row.querySelectorAll('.g-table-cell:nth-child(4) .chakra-text');
+            // A single element is liquidity alone; leave market cap empty rather than store liquidity as it
+            if (liqMcElements.length > 1) {
+                marketCap = liqMcElements[1].textContent.trim();
+            }
+
+            // Extract holders
+            let holders = "";
+            const holdersElement = row.querySelector('.g-table-cell:nth-child(5) .chakra-text');
+            if (holdersElement) {
+                holders = holdersElement.textContent.trim();
+            }
+
+            // Extract transactions
+            let transactions = "";
+            const txElement = row.querySelector('.g-table-cell:nth-child(6) .css-xe0j2');
+            if (txElement) {
+                transactions = txElement.textContent.trim();
+            }
+
+            // Extract volume
+            let volume = "";
+            const volElement = row.querySelector('.g-table-cell:nth-child(7) .chakra-text');
+            if (volElement) {
+                volume = volElement.textContent.trim();
+            }
+
+            // Extract price
+            let price = "";
+            const priceElement = row.querySelector('.g-table-cell:nth-child(8) .chakra-text');
+            if (priceElement) {
+                price = priceElement.textContent.trim();
+            }
+
+            // Extract percentage changes
+            let change1m = "";
+            let change5m = "";
+            let change1h = "";
+
+            const change1mElement = row.querySelector('.g-table-cell:nth-child(9) .css-1srsqcm span');
+            if (change1mElement) {
+                change1m = change1mElement.textContent.trim();
+            }
+
+            const change5mElement = row.querySelector('.g-table-cell:nth-child(10) .css-1srsqcm span');
+            if (change5mElement) {
+                change5m = change5mElement.textContent.trim();
+            }
+
+            const change1hElement = row.querySelector('.g-table-cell:nth-child(11) .css-1srsqcm span');
+            if (change1hElement) {
+                change1h = change1hElement.textContent.trim();
+            }
+
+            // Extract Degen Audit fields
+            let nomint = "";
+            let blacklist = "";
+            let burnt = "";
+            let top10Percentage = "";
+            let insidersPercentage = "";
+
+            // Extract NoMint, Blacklist, and Burnt (Yes/No values)
+            try {
+                // Look for the Yes/No values in cells
+                const degenTexts = Array.from(row.querySelectorAll('*'))
+                    .map(el => el.textContent ? el.textContent.trim() : '')
+                    .filter(text => text === 'Yes' || text === 'No');
+
+                // Based on the screenshots, the order is typically NoMint, Blacklist, Burnt
+                if (degenTexts.length >= 3) {
+                    nomint = degenTexts[0]; 
+                    blacklist = degenTexts[1];
+                    burnt = degenTexts[2];
+                }
+            } catch (err) {
+                console.error("Error extracting Yes/No fields:", err);
+            }
+
+            // Extract Top 10 percentage and Insiders percentage
+            try {
+                // Look for percentage values in the row
+                const percentageValues = Array.from(row.querySelectorAll('*'))
+                    .map(el => el.textContent ? el.textContent.trim() : '')
+                    .filter(text => text.match(/^\d+(\.\d+)?%$/));
+
+                // According to screenshots, first non-zero percentage is Top 10
+                // and the 0% value is usually Insiders
+                for (const pct of percentageValues) {
+                    if (pct !== '0%' && !top10Percentage) {
+                        top10Percentage = pct;
+                    } else if (pct === '0%') {
+                        insidersPercentage = pct;
+                    }
+                }
+            } catch (err) {
+                console.error("Error extracting percentage fields:", err);
+            }
+
+            // Fallback to direct cell content for Top 10 and Insiders
+            if (!top10Percentage || !insidersPercentage) {
+                try {
+                    // Get all cells in the row
+                    const cells = row.querySelectorAll('.g-table-cell');
+
+                    // Based on the screenshots, Top 10 is in one of the later columns
+                    // and Insiders is typically in the column after that
+                    if (cells.length >= 11) { // Estimate based on column count
+                        const top10CellIndex = 11; // Adjust if needed
+                        const insidersCellIndex = 12; // Adjust if needed
+
+                        if (cells[top10CellIndex] && !top10Percentage) {
+                            const cellText = cells[top10CellIndex].textContent.trim();
+                            if (cellText.match(/^\d+(\.\d+)?%$/)) {
+                                top10Percentage = cellText;
+                            }
+                        }
+
+                        if (cells[insidersCellIndex] && !insidersPercentage) {
+                            const cellText = cells[insidersCellIndex].textContent.trim();
+                            if (cellText === '0%') {
+                                insidersPercentage = cellText;
+                            }
+                        }
+                    }
+                } catch (err) {
+                    console.error("Error extracting from cells:", err);
+                }
+            }
+
+            // Extract Dev field
+            let dev = "";
+            const devElement = row.querySelector('.dev-field');
+            if (devElement) {
+                dev = devElement.textContent.trim();
+            } else {
+                // Look for "HODL" or "Sell All" text
+                const nodeList = Array.from(row.querySelectorAll('*'));
+                for (const node of nodeList) {
+                    if (node.textContent && (node.textContent.includes('HODL') || node.textContent.includes('Sell All'))) {
+                        dev = node.textContent.trim();
+                        break;
+                    }
+                }
+            }
+
+            // Get the displayed abbreviated contract address
+            let displayedAddress = "";
+            const addressElement = row.querySelector('.css-vps9hc');
+            if (addressElement) {
+                displayedAddress = addressElement.textContent.trim();
+            }
+
+            // Get raw text for debugging
+            const rawText = row.textContent.trim().substring(0, 200);
+
+            // Log what we found for debugging
+            console.log("Degen Audit extraction results:");
+            console.log("- NoMint:", nomint);
+            console.log("- Blacklist:", blacklist);
+            console.log("- Burnt:", burnt);
+            console.log("- Top 10%:", top10Percentage);
+            console.log("- Insiders%:", insidersPercentage);
+
+            // Log all percentage values found in the row for debugging
+            const allTexts = Array.from(row.querySelectorAll('*'))
+                .map(el => el.textContent ? el.textContent.trim() : '')
+                .filter(text => text.match(/^(\d+(\.\d+)?%)$/) || text === 'Yes' || text === 'No');
+            console.log("All percentage/Yes/No values found:", allTexts);
+
+            return {
+                tokenSymbol,
+                age,
+                solData,
+                percentChange,
+                liquidity,
+                marketCap,
+                price,
+                holders,
+                transactions,
+                volume,
+                change1m,
+                change5m,
+                change1h,
+                contractAddress: fullContractAddress,
+                displayedAddress,
+                nomint,
+                blacklist,
+                burnt,
+                top10Percentage,
+                insidersPercentage,
+                dev,
+                rawText
+            };
+        });
+    } catch (error) {
+        console.error("Error extracting token data:", error);
+        return [];
+    }
+}
+'''
+
+class ScraperState:
+    """In-process state carried from one extraction cycle to the next"""
+    
+    def __init__(self):
+        # In-process rolling metrics fed by each snapshot
+        self.metrics_store = TokenMetricsStore()
+        # 1m/5m/1h OHLC rollups, flushed to token_rollups in batches
+        self.rollup_store = RollupStore()
+        # Narrowest creation-time window seen per token
+        self.creation_tracker = CreationTimeTracker()
+        # Last values written per contract address: (values, written_at epoch seconds)
+        self.last_written = {}
+        # Used to report time-to-first-write after a (re)start
+        self.started_at = time.monotonic()
+        self.first_write_at = None
+    
+    def prune_last_written(self, now, max_age_seconds=86400):
+        """Forget tokens that have not been written for max_age_seconds"""
+        cutoff = epoch_seconds(now) - max_age_seconds
+        stale = [address for address, (_, written_at) in self.last_written.items()
+                 if written_at < cutoff]
+        for address in stale:
+            del self.last_written[address]
+
+# Record fields written to pump_tokens, compared to skip unchanged tokens
+WRITTEN_FIELDS = [
+    'tokenSymbol', 'price', 'liquidity', 'holders', 'transactions', 'volume',
+    'change1m', 'change5m', 'change1h', 'solData', 'percentChange', 'marketCap',
+    'nomint', 'blacklist', 'burnt', 'top10Percentage', 'insidersPercentage', 'dev',
+    'sourceView', 'creationTimeError'
+]
+
+def process_records(conn, records, captured_at, state):
+    """Print a snapshot of records and write it to the database"""
+    new_tokens = 0
+    updated_tokens = 0
+    unchanged_tokens = []
+    written_at = epoch_seconds(captured_at)
+    
+    # Tighten creation-time estimates for the whole snapshot at once
+    for record in records:
+        record['contractAddress'] = normalize_contract_address(
+            record['contractAddress'], record['displayedAddress'])
+    # Records merged from several views carry their own view's capture time
+    creation_times = state.creation_tracker.update(
+        [record['contractAddress'] for record in records],
+        [record['age'] for record in records],
+        [record.get('capturedAt') or captured_at for record in records]
+    )
+    state.creation_tracker.prune(captured_at)
+    
+    for idx, record in enumerate(records):
+        token_info = f"Token #{idx+1}: {record['tokenSymbol']}"
+        creation_time, creation_time_error = creation_times.get(
+            record['contractAddress'], (None, None))
+        record['tokenCreationTime'] = creation_time
+        record['creationTimeError'] = creation_time_error
+        if record['age']:
+            token_info += f" (Age: {record['age']})"
+            
+            # Display the converged token creation time
+            if creation_time:
+                token_info += f" [Created: {creation_time.strftime('%Y-%m-%d %H:%M:%S UTC')} ±{creation_time_error:.0f}s]"
+        
+        print(token_info)
+        
+        # Contract address was already normalized before tracking
+        print(f"  Contract: {record['contractAddress']}")
+        if record['displayedAddress'] and record['displayedAddress'] != record['contractAddress']:
+            print(f"  (Displayed as: {record['displayedAddress']})")
+        
+        if record['solData']:
+            print(f"  {record['solData']} {record['percentChange']}")
+        
+        if record['liquidity']:
+            print(f"  Liquidity: {record['liquidity']}")
+        
+        if record['marketCap']:
+            print(f"  Market Cap: {record['marketCap']}")
+        
+        if record['holders']:
+            print(f"  Holders: {record['holders']}")
+        
+        if record['transactions']:
+            print(f"  Transactions: {record['transactions']}")
+        
+        if record['volume']:
+            print(f"  Volume: {record['volume']}")
+        
+        if record['price']:
+            print(f"  Price: {record['price']}")
+        
+        changes = []
+        if record['change1m']: changes.append(f"1m: {record['change1m']}")
+        if record['change5m']: changes.append(f"5m: {record['change5m']}")
+        if record['change1h']: changes.append(f"1h: {record['change1h']}")
+        
+        if changes:
+            print(f"  Changes: {' | '.join(changes)}")
+        
+        # Print Degen Audit fields
+        degen_audit_fields = []
+        if record['nomint']: degen_audit_fields.append(f"NoMint: {record['nomint']}")
+        if record['blacklist']: degen_audit_fields.append(f"Blacklist: {record['blacklist']}")
+        if record['burnt']: degen_audit_fields.append(f"Burnt: {record['burnt']}")
+        if record['top10Percentage']: degen_audit_fields.append(f"Top 10: {record['top10Percentage']}")
+        if record['insidersPercentage']: degen_audit_fields.append(f"Insiders: {record['insidersPercentage']}")
+        
+        if degen_audit_fields:
+            print(f"  Degen Audit: {' | '.join(degen_audit_fields)}")
+        
+        # Print Dev field
+        if record['dev']:
+            print(f"  Dev: {record['dev']}")
+        
+        # Store in database
+        if record['contractAddress']:
+            values = tuple(record.get(field) for field in WRITTEN_FIELDS)
+            previous = state.last_written.get(record['contractAddress'])
+            if previous and previous[0] == values:
+                unchanged_tokens.append(record['contractAddress'])
+                state.last_written[record['contractAddress']] = (values, written_at)
+            else:
+                was_updated = insert_or_update_token(conn, record, known_exists=previous is not None)
+                state.last_written[record['contractAddress']] = (values, written_at)
+                if was_updated:
+                    updated_tokens += 1
+                else:
+                    new_tokens += 1
+                if state.first_write_at is None:
+                    state.first_write_at = time.monotonic()
+                    print(f"Time to first write after start: {state.first_write_at - state.started_at:.2f}s")
+        
+        print("")
+    
+    # Unchanged tokens still get a fresh updated_at, in one statement
+    touch_tokens(conn, unchanged_tokens)
+    print(f"Database updated: {new_tokens} new tokens, {updated_tokens} updated tokens, {len(unchanged_tokens)} unchanged")
+    state.prune_last_written(captured_at)
+    
+    # Update rolling metrics and rollups for every token in this snapshot
+    metrics = state.metrics_store.update(records, captured_at)
+    print(state.metrics_store.report())
+    state.rollup_store.update(records, captured_at)
+    state.rollup_store.evict_stale(captured_at)
+    
+    # Derived data depends on later migrations; if writing it fails, roll back so
+    # the connection isn't left aborted for the next cycle's pump_tokens writes
+    try:
+        update_token_metrics(conn, metrics)
+        store_snapshot(conn, records, captured_at)
+        flushed = state.rollup_store.flush(conn)
+        if flushed:
+            print(f"Flushed {flushed} rollup buckets")
+    except psycopg2.Error as e:
+        print(f"Error writing derived data: {e}")
+        conn.rollback()
+
 def main():
     print("Attempting to connect to Chrome with remote debugging...")
     
-    gmgn_url = "https://gmgn.ai/new-pair?chain=sol&rd=0&ppa=0&ms=0&fb=0&bp=0&or=0&mo=0&ry=0&0ren=1&0fr=1&0mihc=50&0ihc=1&0mish=50&0ish=1&0miv=5&0iv=1&0mac=30m&0mim=5&0im=1&0mahc=0&0mair=20&0iir=1&0miir=0&0mam=25"
+    gmgn_url = GMGN_URL
     
     # Set up the database
     conn = setup_database()
     print("Database connection setup complete")
     
+    # State carried across extraction cycles, warm-started from the last checkpoint
+    state = ScraperState()
+    database = database_identity(conn)
+    load_checkpoint(state, database)
+    checkpointer = Checkpointer(database)
+    
+    # With LEADER_ELECTION=1 several instances compete for one lease; only the leader extracts and writes
+    lease = None
+    writer = conn
+    if os.getenv("LEADER_ELECTION") == "1":
+        lease = AdvisoryLockLease(os.getenv("LEASE_NAME", DEFAULT_LEASE_NAME))
+        # Every commit re-checks the lease, so a replaced leader can't overwrite the new one
+        writer = FencedConnection(conn, lease)
+        print(f"Leader election enabled for lease '{lease.name}'")
+    leading = False
+    standing_by = False
+    # A hung renderer never answers page calls; give up on them after this many seconds
+    extraction_timeout = float(os.getenv("EXTRACTION_TIMEOUT", "30"))
+    consecutive_errors = 0
+    
     with sync_playwright() as p:
         try:
             # Connect to existing Chrome instance
-            browser = p.chromium.connect_over_cdp("http://localhost:9222")
+            browser = p.chromium.connect_over_cdp(os.getenv("CDP_URL", "http://localhost:9222"))
             context = browser.contexts[0]
             page = context.new_page()
             
@@ -240,274 +822,33 @@ def main():
             # Run the data extraction loop
             while True:
                 try:
+                    if lease:
+                        if not lease.try_acquire():
+                            if leading:
+                                print("Lost leadership lease")
+                                leading = False
+                            if not standing_by:
+                                # Also tells check_failover.py this instance is ready to take over
+                                print(f"Standing by for leadership lease '{lease.name}'")
+                                standing_by = True
+                            # Keep the page warm and make sure the browser is still alive
+                            call_with_timeout(extraction_timeout, page.title)
+                            time.sleep(lease.poll_seconds)
+                            continue
+                        if not leading:
+                            print(f"Acquired leadership lease '{lease.name}'")
+                            leading = True
+                            standing_by = False
+                            # Another instance may have written since our checkpoint, so don't skip any rows
+                            state.last_written = {}
+                    
                     # Take a screenshot to debug what's on the page
                     page.screenshot(path="gmgn_screenshot.png")
                     print("Saved screenshot for debugging")
                     
                     # Manually walk the DOM and extract content
-                    records = page.evaluate('''
-                    () => {
-                        try {
-                            // The table structure on gmgn.ai has rows with data-row-key attributes
-                            const tokenRows = Array.from(document.querySelectorAll('.g-table-row'));
-                            if (tokenRows.length === 0) {
-                                console.log("No token rows found using .g-table-row selector");
-                            }
-                            
-                            return tokenRows.map(row => {
-                                // Get the full contract address from the row link
-                                let fullContractAddress = "";
-                                const tokenLinkElement = row.querySelector('a.css-1ahnstt');
-                                if (tokenLinkElement && tokenLinkElement.getAttribute('href')) {
-                                    const href = tokenLinkElement.getAttribute('href');
-                                    // Format is usually /sol/token/mintAddress
-                                    const parts = href.split('/');
-                                    if (parts.length > 0) {
-                                        fullContractAddress = parts[parts.length - 1];
-                                    }
-                                }
-                                
-                                // Extract token symbol - usually in a div with title attribute or bold text
-                                let tokenSymbol = "";
-                                const tokenNameElement = row.querySelector('.css-9enbzl');
-                                if (tokenNameElement) {
-                                    tokenSymbol = tokenNameElement.textContent.trim();
-                                }
-                                
-                                // Extract time/age
-                                let age = "";
-                                const ageElement = row.querySelector('.g-table-cell:nth-child(2)');
-                                if (ageElement) {
-                                    age = ageElement.textContent.trim();
-                                }
-                                
-                                // Extract SOL data
-                                let solData = "";
-                                let percentChange = "";
-                                const solElement = row.querySelector('.css-1ubmcdg');
-                                if (solElement) {
-                                    // Get the SOL value
-                                    const solValue = solElement.textContent.trim();
-                                    const solMatch = solValue.match(/SOL\\s*([\\d.]+)\\/0\\.015/);
-                                    if (solMatch) {
-                                        solData = "SOL " + solMatch[1] + "/0.015";
-                                    }
-                                    
-                                    // Get the percent change
-                                    const percentElement = solElement.querySelector('.css-ix4bfh');
-                                    if (percentElement) {
-                                        percentChange = percentElement.textContent.trim();
-                                    }
-                                }
-                                
-                                // Extract liquidity
-                                let liquidity = "";
-                                const liquidityElement = row.querySelector('.g-table-cell:nth-child(4) .chakra-text');
-                                if (liquidityElement) {
-                                    liquidity = liquidityElement.textContent.trim();
-                                }
-                                
-                                // Extract market cap (MC)
-                                let marketCap = "";
-                                const mcElement = row.querySelector('.g-table-cell:nth-child(4) .chakra-text');
-                                if (mcElement) {
-                                    marketCap = mcElement.textContent.trim();
-                                }
-                                
-                                // Extract holders
-                                let holders = "";
-                                const holdersElement = row.querySelector('.g-table-cell:nth-child(5) .chakra-text');
-                                if (holdersElement) {
-                                    holders = holdersElement.textContent.trim();
-                                }
-                                
-                                // Extract transactions
-                                let transactions = "";
-                                const txElement = row.querySelector('.g-table-cell:nth-child(6) .css-xe0j2');
-                                if (txElement) {
-                                    transactions = txElement.textContent.trim();
-                                }
-                                
-                                // Extract volume
-                                let volume = "";
-                                const volElement = row.querySelector('.g-table-cell:nth-child(7) .chakra-text');
-                                if (volElement) {
-                                    volume = volElement.textContent.trim();
-                                }
-                                
-                                // Extract price
-                                let price = "";
-                                const priceElement = row.querySelector('.g-table-cell:nth-child(8) .chakra-text');
-                                if (priceElement) {
-                                    price = priceElement.textContent.trim();
-                                }
-                                
-                                // Extract percentage changes
-                                let change1m = "";
-                                let change5m = "";
-                                let change1h = "";
-                                
-                                const change1mElement = row.querySelector('.g-table-cell:nth-child(9) .css-1srsqcm span');
-                                if (change1mElement) {
-                                    change1m = change1mElement.textContent.trim();
-                                }
-                                
-                                const change5mElement = row.querySelector('.g-table-cell:nth-child(10) .css-1srsqcm span');
-                                if (change5mElement) {
-                                    change5m = change5mElement.textContent.trim();
-                                }
-                                
-                                const change1hElement = row.querySelector('.g-table-cell:nth-child(11) .css-1srsqcm span');
-                                if (change1hElement) {
-                                    change1h = change1hElement.textContent.trim();
-                                }
-                                
-                                // Extract Degen Audit fields
-                                let nomint = "";
-                                let blacklist = "";
-                                let burnt = "";
-                                let top10Percentage = "";
-                                let insidersPercentage = "";
-                                
-                                // Extract NoMint, Blacklist, and Burnt (Yes/No values)
-                                try {
-                                    // Look for the Yes/No values in cells
-                                    const degenTexts = Array.from(row.querySelectorAll('*'))
-                                        .map(el => el.textContent ? el.textContent.trim() : '')
-                                        .filter(text => text === 'Yes' || text === 'No');
-                                        
-                                    // Based on the screenshots, the order is typically NoMint, Blacklist, Burnt
-                                    if (degenTexts.length >= 3) {
-                                        nomint = degenTexts[0]; 
-                                        blacklist = degenTexts[1];
-                                        burnt = degenTexts[2];
-                                    }
-                                } catch (err) {
-                                    console.error("Error extracting Yes/No fields:", err);
-                                }
-                                
-                                // Extract Top 10 percentage and Insiders percentage
-                                try {
-                                    // Look for percentage values in the row
-                                    const percentageValues = Array.from(row.querySelectorAll('*'))
-                                        .map(el => el.textContent ? el.textContent.trim() : '')
-                                        .filter(text => text.match(/^\d+(\.\d+)?%$/));
-                                    
-                                    // According to screenshots, first non-zero percentage is Top 10
-                                    // and the 0% value is usually Insiders
-                                    for (const pct of percentageValues) {
-                                        if (pct !== '0%' && !top10Percentage) {
-                                            top10Percentage = pct;
-                                        } else if (pct === '0%') {
-                                            insidersPercentage = pct;
-                                        }
-                                    }
-                                } catch (err) {
-                                    console.error("Error extracting percentage fields:", err);
-                                }
-                                
-                                // Fallback to direct cell content for Top 10 and Insiders
-                                if (!top10Percentage || !insidersPercentage) {
-                                    try {
-                                        // Get all cells in the row
-                                        const cells = row.querySelectorAll('.g-table-cell');
-                                        
-                                        // Based on the screenshots, Top 10 is in one of the later columns
-                                        // and Insiders is typically in the column after that
-                                        if (cells.length >= 11) { // Estimate based on column count
-                                            const top10CellIndex = 11; // Adjust if needed
-                                            const insidersCellIndex = 12; // Adjust if needed
-                                            
-                                            if (cells[top10CellIndex] && !top10Percentage) {
-                                                const cellText = cells[top10CellIndex].textContent.trim();
-                                                if (cellText.match(/^\d+(\.\d+)?%$/)) {
-                                                    top10Percentage = cellText;
-                                                }
-                                            }
-                                            
-                                            if (cells[insidersCellIndex] && !insidersPercentage) {
-                                                const cellText = cells[insidersCellIndex].textContent.trim();
-                                                if (cellText === '0%') {
-                                                    insidersPercentage = cellText;
-                                                }
-                                            }
-                                        }
-                                    } catch (err) {
-                                        console.error("Error extracting from cells:", err);
-                                    }
-                                }
-                                
-                                // Extract Dev field
-                                let dev = "";
-                                const devElement = row.querySelector('.dev-field');
-                                if (devElement) {
-                                    dev = devElement.textContent.trim();
-                                } else {
-                                    // Look for "HODL" or "Sell All" text
-                                    const nodeList = Array.from(row.querySelectorAll('*'));
-                                    for (const node of nodeList) {
-                                        if (node.textContent && (node.textContent.includes('HODL') || node.textContent.includes('Sell All'))) {
-                                            dev = node.textContent.trim();
-                                            break;
-                                        }
-                                    }
-                                }
-                                
-                                // Get the displayed abbreviated contract address
-                                let displayedAddress = "";
-                                const addressElement = row.querySelector('.css-vps9hc');
-                                if (addressElement) {
-                                    displayedAddress = addressElement.textContent.trim();
-                                }
-                                
-                                // Get raw text for debugging
-                                const rawText = row.textContent.trim().substring(0, 200);
-                                
-                                // Log what we found for debugging
-                                console.log("Degen Audit extraction results:");
-                                console.log("- NoMint:", nomint);
-                                console.log("- Blacklist:", blacklist);
-                                console.log("- Burnt:", burnt);
-                                console.log("- Top 10%:", top10Percentage);
-                                console.log("- Insiders%:", insidersPercentage);
-                                
-                                // Log all percentage values found in the row for debugging
-                                const allTexts = Array.from(row.querySelectorAll('*'))
-                                    .map(el => el.textContent ? el.textContent.trim() : '')
-                                    .filter(text => text.match(/^(\d+(\.\d+)?%)$/) || text === 'Yes' || text === 'No');
-                                console.log("All percentage/Yes/No values found:", allTexts);
-                                
-                                return {
-                                    tokenSymbol,
-                                    age,
-                                    solData,
-                                    percentChange,
-                                    liquidity,
-                                    marketCap,
-                                    price,
-                                    holders,
-                                    transactions,
-                                    volume,
-                                    change1m,
-                                    change5m,
-                                    change1h,
-                                    contractAddress: fullContractAddress,
-                                    displayedAddress,
-                                    nomint,
-                                    blacklist,
-                                    burnt,
-                                    top10Percentage,
-                                    insidersPercentage,
-                                    dev,
-                                    rawText
-                                };
-                            });
-                        } catch (error) {
-                            console.error("Error extracting token data:", error);
-                            return [];
-                        }
-                    }
-                    ''')
+                    captured_at = datetime.utcnow()
+                    records = call_with_timeout(extraction_timeout, page.evaluate, EXTRACT_RECORDS_JS)
                     
                     # Log the timestamp
                     current_time = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S UTC")
@@ -516,95 +857,9 @@ def main():
                     # Print the extracted data and store in database
                     if records and len(records) > 0:
                         print(f"Found {len(records)} token entries")
-                        new_tokens = 0
-                        updated_tokens = 0
-                        
-                        for idx, record in enumerate(records):
-                            token_info = f"Token #{idx+1}: {record['tokenSymbol']}"
-                            if record['age']:
-                                token_info += f" (Age: {record['age']})"
-                                
-                                # Calculate and display token creation time
-                                creation_time = calculate_token_creation_time(record['age'])
-                                if creation_time:
-                                    token_info += f" [Created: {creation_time.strftime('%Y-%m-%d %H:%M:%S UTC')}]"
-                                    
-                            print(token_info)
-                            
-                            # Determine the contract address format
-                            contract = record['contractAddress']
-                            display = record['displayedAddress']
-                            
-                            # If the displayed address ends with "...ump", ensure full address does too
-                            if display and display.endswith("...ump") and contract:
-                                # Extract the suffix from displayed address
-                                if not contract.endswith("ump"):
-                                    contract = contract + "ump"
-                                print(f"  Contract: {contract}")
-                                print(f"  (Displayed as: {display})")
-                            else:
-                                print(f"  Contract: {contract}")
-                                if display and display != contract:
-                                    print(f"  (Displayed as: {display})")
-                            
-                            # Update contract address in record
-                            record['contractAddress'] = contract
-                            
-                            if record['solData']:
-                                print(f"  {record['solData']} {record['percentChange']}")
-                            
-                            if record['liquidity']:
-                                print(f"  Liquidity: {record['liquidity']}")
-                                
-                            if record['marketCap']:
-                                print(f"  Market Cap: {record['marketCap']}")
-                                
-                            if record['holders']:
-                                print(f"  Holders: {record['holders']}")
-                                
-                            if record['transactions']:
-                                print(f"  Transactions: {record['transactions']}")
-                            
-                            if record['volume']:
-                                print(f"  Volume: {record['volume']}")
-                                
-                            if record['price']:
-                                print(f"  Price: {record['price']}")
-                            
-                            changes = []
-                            if record['change1m']: changes.append(f"1m: {record['change1m']}")
-                            if record['change5m']: changes.append(f"5m: {record['change5m']}")
-                            if record['change1h']: changes.append(f"1h: {record['change1h']}")
-                            
-                            if changes:
-                                print(f"  Changes: {' | '.join(changes)}")
-                                
-                            # Print Degen Audit fields
-                            degen_audit_fields = []
-                            if record['nomint']: degen_audit_fields.append(f"NoMint: {record['nomint']}")
-                            if record['blacklist']: degen_audit_fields.append(f"Blacklist: {record['blacklist']}")
-                            if record['burnt']: degen_audit_fields.append(f"Burnt: {record['burnt']}")
-                            if record['top10Percentage']: degen_audit_fields.append(f"Top 10: {record['top10Percentage']}")
-                            if record['insidersPercentage']: degen_audit_fields.append(f"Insiders: {record['insidersPercentage']}")
-                            
-                            if degen_audit_fields:
-                                print(f"  Degen Audit: {' | '.join(degen_audit_fields)}")
-                            
-                            # Print Dev field
-                            if record['dev']:
-                                print(f"  Dev: {record['dev']}")
-                                
-                            # Store in database
-                            if record['contractAddress']:
-                                was_updated = insert_or_update_token(conn, record)
-                                if was_updated:
-                                    updated_tokens += 1
-                                else:
-                                    new_tokens += 1
-                            
-                            print("")
-                            
-                        print(f"Database updated: {new_tokens} new tokens, {updated_tokens} updated tokens")
+                        process_records(writer, records, captured_at, state)
+                        # Only reached while leading: a lost lease raises LeaseLostError above
+                        checkpointer.maybe_save(state)
                     else:
                         print("No records found on page")
                         
@@ -624,9 +879,15 @@ def main():
                     
                     print("--- End of data ---\n")
                     
+                    consecutive_errors = 0
+                    
                     # Wait for 1 minute before next extraction
                     print(f"Waiting 60 seconds until next extraction...")
-                    time.sleep(60)
+                    if lease:
+                        # Check the lease and browser while waiting so either failure hands over promptly
+                        wait_while_leading(page, browser, lease, 60)
+                    else:
+                        time.sleep(60)
                     
                     # The data updates automatically, no need to refresh
                     print("Waiting for auto-updated data...")
@@ -634,9 +895,38 @@ def main():
                     # Wait for data to load
                     time.sleep(5)
                     
-                except Exception as ex:
+                except LeaseLostError as ex:
+                    # Not an extraction failure: another instance leads now, so stand by
+                    print(f"{ex}, standing by")
+                    leading = False
+                
+                except ExtractionTimeout as ex:
                     print(f"Error during data extraction: {ex}")
+                    if lease:
+                        # The browser is hung; hand over to a standby with a working one
+                        print("Releasing leadership lease and exiting")
+                        leading = False
+                        lease.release()
+                        break
+                    consecutive_errors += 1
                     time.sleep(10)
+                
+                except Exception as ex:
+                    print(f"Error during data extraction: {ex}")
+                    # A failed statement aborts the transaction; clear it so later cycles can write
+                    try:
+                        conn.rollback()
+                    except psycopg2.Error:
+                        pass
+                    consecutive_errors += 1
+                    if lease and (consecutive_errors >= 3 or not browser.is_connected()):
+                        # Chrome died or keeps failing; hand over to a standby with a working browser
+                        print("Browser unusable, releasing leadership lease and exiting")
+                        leading = False
+                        lease.release()
+                        break
+                    # Retry quickly while leading so a broken leader hands over within seconds
+                    time.sleep(2 if leading else 10)
             
         except Exception as e:
             print(f"Error occurred: {e}")
@@ -644,6 +934,23 @@ def main():
             print("Run this command first:")
             print("/Applications/Google\\ Chrome.app/Contents/MacOS/Google\\ Chrome --user-data-dir=~/chrome-debug-profile --remote-debugging-port=9222 --no-first-run --no-default-browser-check")
         finally:
+            # Only the leader's state reflects what is in the database
+            owns_state = lease is None or (leading and lease.still_held())
+            
+            if owns_state:
+                # Write closed and still-open rollup buckets so a restart doesn't drop them
+                try:
+                    flushed = state.rollup_store.flush(writer, include_open=True)
+                    print(f"Flushed {flushed} rollup buckets on shutdown")
+                except Exception as e:
+                    print(f"Error flushing rollups on shutdown: {e}")
+                
+                # Keep what this run learned for the next start
+                checkpointer.maybe_save(state, force=True)
+            
+            if lease:
+                lease.release()
+            
             # Close database connection
             if conn:
                 conn.close()
@@ -0,0 +1,190 @@
+import asyncio
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from playwright.async_api import async_playwright
+from scraper_checkpoint import Checkpointer, database_identity, load_checkpoint
+from gmgn import (
+    GMGN_URL,
+    EXTRACT_RECORDS_JS,
+    ScraperState,
+    normalize_contract_address,
+    process_records,
+    setup_database,
+)
+
+DEFAULT_CONFIG_PATH = "gmgn_views.json"
+
+DEFAULT_CONFIG = {
+    "cdp_url": "http://localhost:9222",
+    "interval_seconds": 60,
+    # Total page actions (navigations, waits and extractions) across all tabs
+    "actions_per_minute": 30,
+    "views": [
+        {"name": "new_pairs", "url": GMGN_URL}
+    ],
+}
+
+def load_config(path):
+    """Load the multi-view config, falling back to the single default view"""
+    config = dict(DEFAULT_CONFIG)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            config.update(json.load(f))
+    except FileNotFoundError:
+        print(f"No config found at {path}, using the default new pairs view")
+
+    if not config["views"]:
+        raise ValueError("At least one view must be configured")
+    if config["actions_per_minute"] <= 0:
+        raise ValueError(f"actions_per_minute must be positive, got {config['actions_per_minute']}")
+    names = [view["name"] for view in config["views"]]
+    if len(set(names)) != len(names):
+        raise ValueError(f"View names must be unique: {names}")
+    return config
+
+class RateLimiter:
+    """Spaces page actions out so all tabs together stay within the budget"""
+
+    def __init__(self, actions_per_minute):
+        self.interval = 60.0 / actions_per_minute
+        self.next_slot = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            now = time.monotonic()
+            wait = self.next_slot - now
+            self.next_slot = max(self.next_slot, now) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+async def open_view(context, view, limiter):
+    """Open a view in its own tab of the shared browser"""
+    page = await context.new_page()
+    page.set_default_timeout(30000)
+    page.set_default_navigation_timeout(30000)
+
+    await limiter.acquire()
+    print(f"[{view['name']}] Navigating to: {view['url']}")
+    await page.goto(view["url"])
+
+    await limiter.acquire()
+    try:
+        await page.wait_for_selector('table', timeout=15000)
+        print(f"[{view['name']}] Table found on page")
+    except Exception as e:
+        print(f"[{view['name']}] Warning: Table selector not found: {e}")
+    return page
+
+async def extract_view(view, page, limiter):
+    """Extract one view's records and tag them with the view name"""
+    await limiter.acquire()
+    captured_at = datetime.utcnow()
+    try:
+        records = await page.evaluate(EXTRACT_RECORDS_JS)
+    except Exception as e:
+        print(f"[{view['name']}] Error during data extraction: {e}")
+        return captured_at, []
+
+    for record in records:
+        record['sourceView'] = view['name']
+        # Ages in this view are anchored to this view's own capture time
+        record['capturedAt'] = captured_at
+    print(f"[{view['name']}] Found {len(records)} token entries")
+    return captured_at, records
+
+def merge_views(results):
+    """Merge per-view snapshots, keeping one record per token tagged with every view it appeared in"""
+    merged = {}
+    for _, records in results:
+        for record in records:
+            record['contractAddress'] = normalize_contract_address(
+                record['contractAddress'], record['displayedAddress'])
+            address = record['contractAddress']
+            if not address:
+                continue
+            if address in merged:
+                merged[address]['sourceView'] += ',' + record['sourceView']
+            else:
+                merged[address] = record
+
+    # Snapshot-level time for history, metrics and rollups; creation times use each record's capturedAt
+    captured_at = min(captured for captured, _ in results)
+    return captured_at, list(merged.values())
+
+async def run(config):
+    limiter = RateLimiter(config["actions_per_minute"])
+    views = config["views"]
+
+    # One DB connection and one writer thread act as the sink for all views
+    conn = setup_database()
+    sink = ThreadPoolExecutor(max_workers=1)
+    state = ScraperState()
+    database = database_identity(conn)
+    load_checkpoint(state, database)
+    checkpointer = Checkpointer(database)
+    loop = asyncio.get_running_loop()
+    pending_write = None
+
+    try:
+        async with async_playwright() as p:
+            browser = await p.chromium.connect_over_cdp(config["cdp_url"])
+            context = browser.contexts[0]
+            pages = [await open_view(context, view, limiter) for view in views]
+
+            while True:
+                started = time.monotonic()
+                results = await asyncio.gather(*[
+                    extract_view(view, page, limiter) for view, page in zip(views, pages)
+                ])
+                captured_at, records = merge_views(results)
+                print(f"\n--- Data extracted at {captured_at.strftime('%Y-%m-%d %H:%M:%S UTC')} "
+                      f"from {len(views)} views: {len(records)} unique tokens ---")
+
+                # Let the previous cycle's writes finish before queueing the next
+                if pending_write is not None:
+                    try:
+                        await pending_write
+                    except Exception as e:
+                        print(f"Error writing snapshot: {e}")
+                        conn.rollback()
+                    pending_write = None
+                    checkpointer.maybe_save(state)
+                if records:
+                    pending_write = loop.run_in_executor(
+                        sink, process_records, conn, records, captured_at, state)
+
+                remaining = config["interval_seconds"] - (time.monotonic() - started)
+                print(f"Waiting {max(remaining, 0):.0f} seconds until next extraction...")
+                await asyncio.sleep(max(remaining, 0))
+    finally:
+        if pending_write is not None:
+            try:
+                await pending_write
+            except Exception as e:
+                print(f"Error writing snapshot: {e}")
+                conn.rollback()
+        sink.shutdown()
+        # Write closed and still-open rollup buckets so a restart doesn't drop them
+        try:
+            flushed = state.rollup_store.flush(conn, include_open=True)
+            print(f"Flushed {flushed} rollup buckets on shutdown")
+        except Exception as e:
+            print(f"Error flushing rollups on shutdown: {e}")
+        checkpointer.maybe_save(state, force=True)
+        conn.close()
+
+def main():
+    config_path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_CONFIG_PATH
+    config = load_config(config_path)
+    print(f"Scraping {len(config['views'])} views within {config['actions_per_minute']} page actions/minute")
+    try:
+        asyncio.run(run(config))
+    except KeyboardInterrupt:
+        print("Stopped")
+
+if __name__ == '__main__':
+    main()
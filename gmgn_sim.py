@@ -0,0 +1,276 @@
+import argparse
+import json
+import random
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from synthetic_records import make_record, mutate_records
+
+# Same row/cell structure and class names that EXTRACT_RECORDS_JS in gmgn.py reads
+PAGE_HTML = '''<!DOCTYPE html>
+<html>
+<head><meta charset="utf-8"><title>gmgn feed simulator</title></head>
+<body>
+<table><tbody><tr><td>Simulated new pairs</td></tr></tbody></table>
+<div id="rows"></div>
+<script>
+function esc(text) {
+    const div = document.createElement('div');
+    div.textContent = text;
+    return div.innerHTML;
+}
+
+function renderRow(t) {
+    return '<div class="g-table-row" data-row-key="' + esc(t.contractAddress) + '">' +
+        '<div class="g-table-cell">' +
+            '<a class="css-1ahnstt" href="/sol/token/' + esc(t.contractAddress) + '">' +
+                '<div class="css-9enbzl">' + esc(t.tokenSymbol) + '</div>' +
+            '</a>' +
+            '<div class="css-vps9hc">' + esc(t.displayedAddress) + '</div>' +
+        '</div>' +
+        '<div class="g-table-cell">' + esc(t.age) + '</div>' +
+        '<div class="g-table-cell"><div class="css-1ubmcdg">' + esc(t.solData) +
+            '<span class="css-ix4bfh">' + esc(t.percentChange) + '</span></div></div>' +
+        '<div class="g-table-cell"><p class="chakra-text">' + esc(t.liquidity) + '</p>' +
+            '<p class="chakra-text">' + esc(t.marketCap) + '</p></div>' +
+        '<div class="g-table-cell"><p class="chakra-text">' + esc(t.holders) + '</p></div>' +
+        '<div class="g-table-cell"><div class="css-xe0j2">' + esc(t.transactions) + '</div></div>' +
+        '<div class="g-table-cell"><p class="chakra-text">' + esc(t.volume) + '</p></div>' +
+        '<div class="g-table-cell"><p class="chakra-text">' + esc(t.price) + '</p></div>' +
+        '<div class="g-table-cell"><div class="css-1srsqcm"><span>' + esc(t.change1m) + '</span></div></div>' +
+        '<div class="g-table-cell"><div class="css-1srsqcm"><span>' + esc(t.change5m) + '</span></div></div>' +
+        '<div class="g-table-cell"><div class="css-1srsqcm"><span>' + esc(t.change1h) + '</span></div></div>' +
+        '<div class="g-table-cell"><span>' + esc(t.nomint) + '</span><span>' + esc(t.blacklist) +
+            '</span><span>' + esc(t.burnt) + '</span></div>' +
+        '<div class="g-table-cell">' + esc(t.top10Percentage) + '</div>' +
+        '<div class="g-table-cell">' + esc(t.insidersPercentage) + '</div>' +
+        '<div class="g-table-cell"><span class="dev-field">' + esc(t.dev) + '</span></div>' +
+    '</div>';
+}
+
+async function poll() {
+    try {
+        const response = await fetch('/rows');
+        const data = await response.json();
+        if (!data.stalled) {
+            document.getElementById('rows').innerHTML = data.rows.map(renderRow).join('');
+        }
+    } catch (err) {
+        console.error("Simulator poll failed:", err);
+    }
+    setTimeout(poll, POLL_MS);
+}
+
+const POLL_MS = %(poll_ms)d;
+poll();
+</script>
+</body>
+</html>
+'''
+
+def format_age(seconds):
+    """Format an age the way gmgn displays it (e.g. '45s', '3m', '2h', '1d')"""
+    seconds = int(seconds)
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}m"
+    if seconds < 86400:
+        return f"{seconds // 3600}h"
+    return f"{seconds // 86400}d"
+
+class FeedSimulator:
+    """Synthetic gmgn new-pairs table that churns at configurable rates.
+
+    A background thread launches, updates and removes tokens. Every change
+    is logged with its wall-clock time so a soak monitor can measure the
+    delay until the scraper commits it.
+    """
+
+    def __init__(self, launches_per_sec=0.5, updates_per_sec=5.0, removals_per_sec=0.4,
+                 max_rows=100, stall_every=0, stall_seconds=0, seed=None, log_size=100000):
+        self.launches_per_sec = launches_per_sec
+        self.updates_per_sec = updates_per_sec
+        self.removals_per_sec = removals_per_sec
+        self.max_rows = max_rows
+        self.stall_every = stall_every
+        self.stall_seconds = stall_seconds
+
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.tokens = {}
+        self.created_at = {}
+        self.mutations = deque(maxlen=log_size)
+        self.counter = 0
+        self.stalled_until = 0
+        self.next_stall = time.time() + stall_every if stall_every else None
+        self.running = False
+
+    def _log(self, record, kind, now):
+        self.mutations.append({
+            'contractAddress': record['contractAddress'],
+            'price': record['price'],
+            'kind': kind,
+            'mutatedAt': now,
+        })
+
+    def _launch(self, now):
+        record = make_record(self.rng, self.counter)
+        self.counter += 1
+        self.tokens[record['contractAddress']] = record
+        self.created_at[record['contractAddress']] = now - self.rng.uniform(0, 5)
+        self._log(record, 'launch', now)
+
+        # The table only shows the newest max_rows pairs
+        while len(self.tokens) > self.max_rows:
+            oldest = next(iter(self.tokens))
+            self._remove(oldest, now)
+
+    def _update(self, now):
+        if not self.tokens:
+            return
+        address = self.rng.choice(list(self.tokens))
+        record = mutate_records(self.rng, [self.tokens[address]], 1.0)[0]
+        self.tokens[address] = record
+        self._log(record, 'update', now)
+
+    def _remove(self, address, now):
+        record = self.tokens.pop(address)
+        self.created_at.pop(address)
+        self._log(record, 'remove', now)
+
+    def _events(self, rate, elapsed):
+        """Number of events in this tick for a Poisson process with the given rate"""
+        count = 0
+        remaining = rate * elapsed
+        while remaining > 0:
+            if self.rng.random() < min(remaining, 1.0):
+                count += 1
+            remaining -= 1.0
+        return count
+
+    def seed_rows(self, count):
+        """Fill the table with an initial set of pairs"""
+        now = time.time()
+        with self.lock:
+            for _ in range(count):
+                self._launch(now)
+
+    def step(self, elapsed):
+        """Advance the simulation by elapsed seconds"""
+        now = time.time()
+        with self.lock:
+            if self.next_stall and now >= self.next_stall:
+                self.stalled_until = now + self.stall_seconds
+                self.next_stall = now + self.stall_every
+                print(f"Simulating a {self.stall_seconds}s stall")
+            if now < self.stalled_until:
+                return
+
+            for _ in range(self._events(self.launches_per_sec, elapsed)):
+                self._launch(now)
+            for _ in range(self._events(self.updates_per_sec, elapsed)):
+                self._update(now)
+            for _ in range(self._events(self.removals_per_sec, elapsed)):
+                if self.tokens:
+                    self._remove(self.rng.choice(list(self.tokens)), now)
+
+    def run(self, tick_seconds=0.1):
+        self.running = True
+        last = time.monotonic()
+        while self.running:
+            time.sleep(tick_seconds)
+            current = time.monotonic()
+            self.step(current - last)
+            last = current
+
+    def snapshot(self):
+        """Rows as currently displayed, newest first"""
+        now = time.time()
+        with self.lock:
+            stalled = now < self.stalled_until
+            rows = []
+            for address in reversed(list(self.tokens)):
+                row = dict(self.tokens[address])
+                row['age'] = format_age(now - self.created_at[address])
+                rows.append(row)
+        return {'stalled': stalled, 'rows': rows}
+
+    def mutations_since(self, since):
+        with self.lock:
+            return [m for m in self.mutations if m['mutatedAt'] > since]
+
+def make_handler(simulator, poll_ms):
+    class SimulatorHandler(BaseHTTPRequestHandler):
+        def _send(self, body, content_type):
+            data = body.encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(data)))
+            self.send_header('Cache-Control', 'no-store')
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == '/rows':
+                self._send(json.dumps(simulator.snapshot()), 'application/json')
+            elif url.path == '/mutations':
+                since = float(parse_qs(url.query).get('since', ['0'])[0])
+                self._send(json.dumps(simulator.mutations_since(since)), 'application/json')
+            elif url.path in ('/', '/new-pair'):
+                self._send(PAGE_HTML % {'poll_ms': poll_ms}, 'text/html; charset=utf-8')
+            else:
+                self.send_error(404)
+
+        def log_message(self, format, *args):
+            # Polling every few hundred milliseconds would flood the console
+            pass
+
+    return SimulatorHandler
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a churning synthetic gmgn new-pairs page")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--launches-per-sec', type=float, default=0.5)
+    parser.add_argument('--updates-per-sec', type=float, default=5.0)
+    parser.add_argument('--removals-per-sec', type=float, default=0.4)
+    parser.add_argument('--max-rows', type=int, default=100)
+    parser.add_argument('--stall-every', type=float, default=0,
+                        help="seconds between simulated stalls (0 disables)")
+    parser.add_argument('--stall-seconds', type=float, default=30)
+    parser.add_argument('--poll-ms', type=int, default=500,
+                        help="how often the page refreshes its rows")
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    simulator = FeedSimulator(
+        launches_per_sec=args.launches_per_sec,
+        updates_per_sec=args.updates_per_sec,
+        removals_per_sec=args.removals_per_sec,
+        max_rows=args.max_rows,
+        stall_every=args.stall_every,
+        stall_seconds=args.stall_seconds,
+        seed=args.seed
+    )
+    simulator.seed_rows(min(args.max_rows, 30))
+
+    threading.Thread(target=simulator.run, daemon=True).start()
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(simulator, args.poll_ms))
+    print(f"Simulated gmgn feed at http://{args.host}:{args.port}/")
+    print("Point a scraper with its own scratch database and checkpoint at it:")
+    print(f"  DB_NAME=gmgn_soak CHECKPOINT_PATH=soak_state.ckpt.gz GMGN_URL=http://{args.host}:{args.port}/ python gmgn.py")
+    print("  python gmgn_soak.py --db-name gmgn_soak")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Stopped")
+    finally:
+        simulator.running = False
+        server.server_close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from urllib.request import urlopen
+from dotenv import dotenv_values
+from bench_db_writes import percentile
+from gmgn import setup_database
+from token_ages import epoch_seconds
+
+def fetch_mutations(sim_url, since):
+    """Fetch launch/update events logged by gmgn_sim.py after the given time"""
+    with urlopen(f"{sim_url.rstrip('/')}/mutations?since={since}", timeout=10) as response:
+        return json.loads(response.read().decode('utf-8'))
+
+def read_rss_kib(pid):
+    """Resident memory of a process in KiB, read from /proc"""
+    try:
+        with open(f"/proc/{pid}/status", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+class SoakMonitor:
+    """Matches simulator mutations to committed pump_tokens rows.
+
+    Every launch/update gives a token a new price. The first time that price
+    is seen in pump_tokens, the row's updated_at (set right before the
+    commit) minus the mutation time is the end-to-end latency.
+    """
+
+    def __init__(self, conn, sim_url, scraper_pid=None):
+        self.conn = conn
+        self.sim_url = sim_url
+        self.scraper_pid = scraper_pid
+        self.pending = {}
+        self.latencies = []
+        self.superseded = 0
+        self.rows_committed = 0
+        self.last_mutation = time.time()
+        self.last_commit = datetime.utcnow()
+
+    def poll(self):
+        # Remember the newest price per token; an older unseen price was overwritten
+        for mutation in fetch_mutations(self.sim_url, self.last_mutation):
+            self.last_mutation = max(self.last_mutation, mutation['mutatedAt'])
+            if mutation['kind'] == 'remove':
+                self.pending.pop(mutation['contractAddress'], None)
+                continue
+            if mutation['contractAddress'] in self.pending:
+                self.superseded += 1
+            self.pending[mutation['contractAddress']] = (mutation['price'], mutation['mutatedAt'])
+
+        cursor = self.conn.cursor()
+        cursor.execute('''
+        SELECT contract_address, price, updated_at
+        FROM pump_tokens
+        WHERE updated_at > %s
+        ''', (self.last_commit,))
+        rows = cursor.fetchall()
+        self.conn.commit()
+
+        for contract_address, price, updated_at in rows:
+            self.rows_committed += 1
+            self.last_commit = max(self.last_commit, updated_at)
+            expected = self.pending.get(contract_address)
+            if expected and expected[0] == price:
+                self.latencies.append(epoch_seconds(updated_at) - expected[1])
+                del self.pending[contract_address]
+
+    def report(self, elapsed):
+        """Summary of the run so far"""
+        return {
+            'at': datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S UTC"),
+            'elapsed_seconds': round(elapsed, 1),
+            'mutations_committed': len(self.latencies),
+            'mutations_pending': len(self.pending),
+            'mutations_superseded': self.superseded,
+            'latency_p50_s': percentile(self.latencies, 0.50),
+            'latency_p99_s': percentile(self.latencies, 0.99),
+            'latency_max_s': max(self.latencies) if self.latencies else None,
+            'rows_committed': self.rows_committed,
+            'rows_per_sec': round(self.rows_committed / elapsed, 2) if elapsed > 0 else None,
+            'scraper_rss_kib': read_rss_kib(self.scraper_pid) if self.scraper_pid else None,
+        }
+
+SCRAPER_USAGE = '''
+Run the scraper against the simulator with its own database and checkpoint,
+so neither the production tables nor the production warm-start state are touched:
+
+  DB_NAME=gmgn_soak CHECKPOINT_PATH=soak_state.ckpt.gz \\
+  GMGN_URL=http://127.0.0.1:8765/ python gmgn.py
+
+then pass the same database here with --db-name gmgn_soak.
+'''
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure mutation-to-commit latency of the scraper against gmgn_sim.py",
+                                     epilog=SCRAPER_USAGE,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sim-url', default='http://127.0.0.1:8765')
+    parser.add_argument('--db-name', default=os.getenv("SOAK_DB_NAME"),
+                        help="scratch database the soak scraper writes to (or SOAK_DB_NAME); "
+                             "must differ from DB_NAME in .env")
+    parser.add_argument('--scraper-pid', type=int, default=None,
+                        help="PID of the running gmgn.py to sample memory from")
+    parser.add_argument('--hours', type=float, default=1.0)
+    parser.add_argument('--poll-seconds', type=float, default=1.0)
+    parser.add_argument('--report-seconds', type=float, default=60.0)
+    parser.add_argument('--output', default='soak_output.txt',
+                        help="file to append JSON report lines to")
+    args = parser.parse_args()
+
+    if not args.db_name:
+        parser.error("--db-name (or SOAK_DB_NAME) is required")
+    if args.db_name == dotenv_values().get("DB_NAME"):
+        print(f"Refusing to soak against {args.db_name}: it is the DB_NAME configured in .env")
+        sys.exit(1)
+
+    conn = setup_database(args.db_name)
+    monitor = SoakMonitor(conn, args.sim_url, args.scraper_pid)
+    started = time.monotonic()
+    next_report = started + args.report_seconds
+    deadline = started + args.hours * 3600
+
+    try:
+        while time.monotonic() < deadline:
+            try:
+                monitor.poll()
+            except Exception as e:
+                print(f"Error polling: {e}")
+                conn.rollback()
+
+            if time.monotonic() >= next_report:
+                report = monitor.report(time.monotonic() - started)
+                print(json.dumps(report))
+                with open(args.output, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(report) + '\n')
+                next_report += args.report_seconds
+
+            time.sleep(args.poll_seconds)
+    except KeyboardInterrupt:
+        print("Stopped")
+    finally:
+        report = monitor.report(time.monotonic() - started)
+        print(json.dumps(report))
+        with open(args.output, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(report) + '\n')
+        conn.close()
+
+if __name__ == '__main__':
+    main()
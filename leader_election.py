@@ -0,0 +1,123 @@
+import os
+import psycopg2
+from dotenv import load_dotenv
+
+DEFAULT_LEASE_NAME = "gmgn_scraper"
+
+def connect_lease_database():
+    """Open a dedicated connection for holding the lease.
+
+    Client and server TCP keepalives are tightened so that a leader whose
+    host or network disappears loses the lock within seconds, instead of
+    after the operating system's default of two hours.
+    """
+    load_dotenv()
+    conn = psycopg2.connect(
+        dbname=os.getenv("DB_NAME", "postgres"),
+        user=os.getenv("DB_USER", "postgres"),
+        password=os.getenv("DB_PASSWORD", ""),
+        host=os.getenv("DB_HOST", "localhost"),
+        port=os.getenv("DB_PORT", "5432"),
+        keepalives=1,
+        keepalives_idle=5,
+        keepalives_interval=2,
+        keepalives_count=3,
+        connect_timeout=5
+    )
+    conn.autocommit = True
+    cursor = conn.cursor()
+    cursor.execute("SET tcp_keepalives_idle = 5")
+    cursor.execute("SET tcp_keepalives_interval = 2")
+    cursor.execute("SET tcp_keepalives_count = 3")
+    cursor.execute("SET statement_timeout = '5s'")
+    return conn
+
+class LeaseLostError(Exception):
+    """Raised instead of committing when the writer no longer holds the lease"""
+
+class AdvisoryLockLease:
+    """Leadership lease backed by a session-level Postgres advisory lock.
+
+    The lock lives as long as the lease connection, so it is released as soon
+    as the leader process exits, crashes or loses its connection. Only the
+    instance holding it should extract and write.
+    """
+
+    def __init__(self, name=DEFAULT_LEASE_NAME, poll_seconds=1.0):
+        self.name = name
+        self.poll_seconds = poll_seconds
+        self.conn = None
+        self.held = False
+
+    def _connection(self):
+        if self.conn is None or self.conn.closed:
+            self.conn = connect_lease_database()
+        return self.conn
+
+    def try_acquire(self):
+        """Try once to take the lease; returns True if this instance is now the leader"""
+        if self.held:
+            return self.still_held()
+        try:
+            cursor = self._connection().cursor()
+            cursor.execute("SELECT pg_try_advisory_lock(hashtext(%s))", (self.name,))
+            self.held = cursor.fetchone()[0]
+        except psycopg2.Error as e:
+            print(f"Lease check failed: {e}")
+            self._drop_connection()
+        return self.held
+
+    def still_held(self):
+        """Confirm the lease connection, and with it the lock, is still alive"""
+        if not self.held:
+            return False
+        try:
+            cursor = self._connection().cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+        except psycopg2.Error as e:
+            print(f"Lost lease '{self.name}': {e}")
+            self._drop_connection()
+        return self.held
+
+    def release(self):
+        """Give up leadership so a standby can take over"""
+        if not self.held:
+            return
+        try:
+            cursor = self._connection().cursor()
+            cursor.execute("SELECT pg_advisory_unlock(hashtext(%s))", (self.name,))
+        except psycopg2.Error:
+            # Closing the connection below releases the lock anyway
+            pass
+        self._drop_connection()
+
+    def _drop_connection(self):
+        self.held = False
+        if self.conn is not None:
+            try:
+                self.conn.close()
+            except psycopg2.Error:
+                pass
+        self.conn = None
+
+class FencedConnection:
+    """Database connection whose commits only go through while the lease is held.
+
+    A leader that was paused or partitioned long enough for a standby to take
+    over rolls back instead of committing on top of the new leader's writes.
+    Everything except commit() is passed through to the wrapped connection.
+    """
+
+    def __init__(self, conn, lease):
+        self.conn = conn
+        self.lease = lease
+
+    def commit(self):
+        if not self.lease.still_held():
+            self.conn.rollback()
+            raise LeaseLostError(f"Lease '{self.lease.name}' lost before commit, rolled back")
+        self.conn.commit()
+
+    def __getattr__(self, name):
+        return getattr(self.conn, name)
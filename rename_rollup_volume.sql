@@ -0,0 +1,5 @@
+ALTER TABLE token_rollups 
+RENAME COLUMN volume TO volume_close;
+
+ALTER TABLE token_rollups 
+ADD COLUMN volume_open double precision;
@@ -0,0 +1,108 @@
+import gzip
+import json
+import os
+import tempfile
+import time
+from datetime import datetime
+
+# Bump whenever the layout below changes; older checkpoints are then ignored
+CHECKPOINT_VERSION = 2
+DEFAULT_CHECKPOINT_PATH = "gmgn_state.ckpt.gz"
+
+def checkpoint_path():
+    """Checkpoint file for this instance; CHECKPOINT_PATH overrides it (e.g. for soak runs)"""
+    return os.getenv("CHECKPOINT_PATH", DEFAULT_CHECKPOINT_PATH)
+
+def database_identity(conn):
+    """Identify the database a connection writes to, e.g. 'localhost:5432/postgres'"""
+    return f"{conn.info.host}:{conn.info.port}/{conn.info.dbname}"
+
+def save_checkpoint(state, database, path):
+    """Atomically write the scraper's in-process state to a gzipped JSON file"""
+    payload = {
+        'version': CHECKPOINT_VERSION,
+        'database': database,
+        'saved_at': datetime.utcnow().isoformat(),
+        'last_written': {
+            address: [list(values), written_at]
+            for address, (values, written_at) in state.last_written.items()
+        },
+        'creation_bounds': {
+            address: list(bounds)
+            for address, bounds in state.creation_tracker.bounds.items()
+        },
+    }
+
+    # Write a uniquely named file next to the target and rename over it, so a
+    # crash mid-write never leaves a truncated checkpoint behind and two
+    # instances sharing a directory never write the same temporary file
+    fd, temp_path = tempfile.mkstemp(prefix=os.path.basename(path) + '.',
+                                     suffix='.tmp',
+                                     dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(fd, 'wb') as raw:
+            with gzip.GzipFile(fileobj=raw, mode='wb') as gz:
+                gz.write(json.dumps(payload, separators=(',', ':')).encode('utf-8'))
+            raw.flush()
+            os.fsync(raw.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return os.path.getsize(path)
+
+def load_checkpoint(state, database, path=None):
+    """Restore state from a checkpoint; returns False and leaves state cold if none is usable"""
+    path = path or checkpoint_path()
+    if not os.path.exists(path):
+        print(f"No checkpoint at {path}, starting cold")
+        return False
+
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            payload = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Ignoring unreadable checkpoint {path}: {e}")
+        return False
+
+    if payload.get('version') != CHECKPOINT_VERSION:
+        print(f"Ignoring checkpoint version {payload.get('version')}, expected {CHECKPOINT_VERSION}")
+        return False
+
+    # Rows remembered as written only exist in the database they were written to
+    if payload.get('database') != database:
+        print(f"Ignoring checkpoint for database {payload.get('database')}, connected to {database}")
+        return False
+
+    state.last_written = {
+        address: (tuple(values), written_at)
+        for address, (values, written_at) in payload['last_written'].items()
+    }
+    state.creation_tracker.bounds = {
+        address: tuple(bounds)
+        for address, bounds in payload['creation_bounds'].items()
+    }
+    print(f"Loaded checkpoint from {payload['saved_at']} UTC: "
+          f"{len(state.last_written)} written tokens, "
+          f"{len(state.creation_tracker.bounds)} creation-time bounds")
+    return True
+
+class Checkpointer:
+    """Saves the scraper state at most once every interval_seconds"""
+
+    def __init__(self, database, path=None, interval_seconds=300):
+        self.database = database
+        self.path = path or checkpoint_path()
+        self.interval_seconds = interval_seconds
+        self.last_saved = time.monotonic()
+
+    def maybe_save(self, state, force=False):
+        if not force and time.monotonic() - self.last_saved < self.interval_seconds:
+            return
+        try:
+            size = save_checkpoint(state, self.database, self.path)
+            print(f"Checkpoint saved to {self.path} ({size / 1024:.1f} KiB)")
+        except OSError as e:
+            print(f"Error saving checkpoint: {e}")
+        self.last_saved = time.monotonic()
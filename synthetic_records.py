@@ -0,0 +1,66 @@
+import string
+
+# Generators for synthetic gmgn rows, shared by bench_db_writes.py and gmgn_sim.py.
+# Kept free of third-party imports so the simulator runs without a database driver.
+
+def format_amount(value):
+    """Format a number the way gmgn abbreviates it (e.g. '$12.3K')"""
+    for suffix, size in (('B', 1e9), ('M', 1e6), ('K', 1e3)):
+        if value >= size:
+            return f"${value / size:.1f}{suffix}"
+    return f"${value:.0f}"
+
+def format_price(value):
+    """Format a small price using gmgn's subscript-zero notation"""
+    digits = f"{value:.12f}".split('.')[1]
+    zeros = len(digits) - len(digits.lstrip('0'))
+    if zeros < 4:
+        return f"${value:.6f}"
+    subscript = str(zeros).translate(str.maketrans('0123456789', '₀₁₂₃₄₅₆₇₈₉'))
+    return f"$0.0{subscript}{digits[zeros:zeros + 4]}"
+
+def format_change(rng):
+    """Random percentage change string"""
+    return f"{rng.uniform(-60, 250):.1f}%"
+
+def make_record(rng, index):
+    """Generate a realistic synthetic record with the fields gmgn.py extracts"""
+    address = ''.join(rng.choices(string.ascii_letters + string.digits, k=40)) + 'pump'
+    return {
+        'tokenSymbol': ''.join(rng.choices(string.ascii_uppercase, k=rng.randint(3, 8))),
+        'age': f"{rng.randint(1, 59)}{rng.choice('sm')}",
+        'solData': f"SOL {rng.uniform(0, 85):.3f}/0.015",
+        'percentChange': format_change(rng),
+        'liquidity': format_amount(rng.uniform(5e3, 5e5)),
+        'marketCap': format_amount(rng.uniform(5e3, 5e6)),
+        'price': format_price(rng.uniform(1e-7, 1e-3)),
+        'holders': str(rng.randint(1, 3000)),
+        'transactions': str(rng.randint(1, 20000)),
+        'volume': format_amount(rng.uniform(1e3, 2e6)),
+        'change1m': format_change(rng),
+        'change5m': format_change(rng),
+        'change1h': format_change(rng),
+        'contractAddress': address,
+        'displayedAddress': address[:4] + '...ump',
+        'nomint': rng.choice(['Yes', 'No']),
+        'blacklist': rng.choice(['Yes', 'No']),
+        'burnt': rng.choice(['Yes', 'No']),
+        'top10Percentage': f"{rng.uniform(5, 90):.1f}%",
+        'insidersPercentage': '0%',
+        'dev': rng.choice(['HODL', 'Sell All', '']),
+        'rawText': f"synthetic row {index}",
+    }
+
+def mutate_records(rng, records, change_ratio):
+    """Return a follow-up snapshot where change_ratio of tokens moved"""
+    updated = []
+    for record in records:
+        record = dict(record)
+        if rng.random() < change_ratio:
+            record['price'] = format_price(rng.uniform(1e-7, 1e-3))
+            record['marketCap'] = format_amount(rng.uniform(5e3, 5e6))
+            record['holders'] = str(int(record['holders']) + rng.randint(0, 50))
+            record['volume'] = format_amount(rng.uniform(1e3, 2e6))
+            record['change1m'] = format_change(rng)
+        updated.append(record)
+    return updated
@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta
+import numpy as np
+from token_ages import EPOCH, CreationTimeTracker, creation_bounds, epoch_seconds, parse_ages
+
+CAPTURED_AT = datetime(2026, 1, 1, 12, 0, 0)
+
+def test_parse_ages_handles_compound_and_day_units():
+    ages, resolutions = parse_ages(['30s', '1h 5m', '1d', '', None, 'n/a'])
+
+    assert ages[:3].tolist() == [30, 3900, 86400]
+    assert resolutions[:3].tolist() == [1, 60, 86400]
+    assert np.isnan(ages[3:]).all()
+    assert np.isnan(resolutions[3:]).all()
+
+def test_creation_bounds_are_anchored_to_capture_time():
+    earliest, latest = creation_bounds(['5m'], CAPTURED_AT)
+
+    assert latest[0] == epoch_seconds(CAPTURED_AT) - 300
+    assert earliest[0] == epoch_seconds(CAPTURED_AT) - 360
+
+def test_creation_bounds_accept_per_row_capture_times():
+    later = CAPTURED_AT + timedelta(seconds=4)
+
+    earliest, latest = creation_bounds(['5m', '5m'], [CAPTURED_AT, later])
+
+    assert latest.tolist() == [epoch_seconds(CAPTURED_AT) - 300, epoch_seconds(later) - 300]
+    assert earliest.tolist() == [epoch_seconds(CAPTURED_AT) - 360, epoch_seconds(later) - 360]
+
+def test_first_observation_uses_midpoint_of_display_window():
+    tracker = CreationTimeTracker()
+
+    estimate, error = tracker.update(['a'], ['5m'], CAPTURED_AT)['a']
+
+    assert estimate == CAPTURED_AT - timedelta(seconds=330)
+    assert error == 30
+
+def test_later_observations_intersect_to_the_narrowest_window():
+    tracker = CreationTimeTracker()
+    tracker.update(['a'], ['5m'], CAPTURED_AT)
+
+    # 40s later the age reads 6m, which rules out creation after t-320
+    estimate, error = tracker.update(['a'], ['6m'], CAPTURED_AT + timedelta(seconds=40))['a']
+
+    assert tracker.bounds['a'] == (epoch_seconds(CAPTURED_AT) - 360, epoch_seconds(CAPTURED_AT) - 320)
+    assert estimate == CAPTURED_AT - timedelta(seconds=340)
+    assert error == 20
+
+def test_wider_observation_does_not_loosen_the_estimate():
+    tracker = CreationTimeTracker()
+    tracker.update(['a'], ['5m'], CAPTURED_AT)
+    tracker.update(['a'], ['6m'], CAPTURED_AT + timedelta(seconds=40))
+
+    _, error = tracker.update(['a'], ['0h 6m'], CAPTURED_AT + timedelta(seconds=45))['a']
+
+    assert error == 20
+
+def test_disjoint_observation_resets_the_window():
+    tracker = CreationTimeTracker()
+    tracker.update(['a'], ['5m'], CAPTURED_AT)
+
+    # An age that cannot overlap the stored window, e.g. after a clock jump
+    estimate, error = tracker.update(['a'], ['1h'], CAPTURED_AT)['a']
+
+    assert tracker.bounds['a'] == (epoch_seconds(CAPTURED_AT) - 7200, epoch_seconds(CAPTURED_AT) - 3600)
+    assert estimate == CAPTURED_AT - timedelta(seconds=5400)
+    assert error == 1800
+
+def test_unparseable_ages_and_missing_addresses_are_skipped():
+    tracker = CreationTimeTracker()
+
+    results = tracker.update(['a', '', 'c'], ['abc', '5m', '30s'], CAPTURED_AT)
+
+    assert list(results) == ['c']
+    assert list(tracker.bounds) == ['c']
+
+def test_prune_drops_old_tokens():
+    tracker = CreationTimeTracker()
+    tracker.update(['old', 'new'], ['2d', '5m'], CAPTURED_AT)
+
+    assert tracker.prune(CAPTURED_AT) == 1
+    assert list(tracker.bounds) == ['new']
+    assert EPOCH + timedelta(seconds=tracker.bounds['new'][1]) == CAPTURED_AT - timedelta(seconds=300)
@@ -0,0 +1,113 @@
+from datetime import datetime, timedelta
+import pytest
+import token_rollups
+from token_rollups import RollupStore
+
+CAPTURED_AT = datetime(2026, 1, 1, 12, 0, 0)
+
+class FakeConnection:
+    """Records the rows each flush writes instead of talking to Postgres"""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.commits = 0
+
+    def cursor(self):
+        return self
+
+    def commit(self):
+        self.commits += 1
+
+@pytest.fixture
+def written(monkeypatch):
+    """Rows passed to execute_values, keyed by (contract_address, resolution, bucket_start)"""
+    batches = []
+
+    def fake_execute_values(cursor, sql, rows, page_size=None):
+        if cursor.fail:
+            raise RuntimeError("write failed")
+        batches.append({row[:3]: row for row in rows})
+
+    monkeypatch.setattr(token_rollups, 'execute_values', fake_execute_values)
+    return batches
+
+def samples_of(row):
+    return row[-1]
+
+def test_new_bucket_start_closes_the_previous_bucket():
+    store = RollupStore()
+    store.add_sample('a', CAPTURED_AT, 1.0, 100.0, 10)
+    store.add_sample('a', CAPTURED_AT + timedelta(seconds=30), 3.0, 150.0, 12)
+    store.add_sample('a', CAPTURED_AT + timedelta(seconds=61), 2.0, 180.0, 13)
+
+    closed = [b for b in store.closed_buckets if b['resolution'] == '1m']
+    assert len(closed) == 1
+    assert (closed[0]['open'], closed[0]['high'], closed[0]['low'], closed[0]['close']) == (1.0, 3.0, 1.0, 3.0)
+    assert (closed[0]['volume_open'], closed[0]['volume_close']) == (100.0, 150.0)
+    assert closed[0]['samples'] == 2
+    # The 5m and 1h buckets are still open
+    assert store.open_buckets[('a', '5m')]['samples'] == 3
+
+def test_out_of_order_sample_for_closed_bucket_is_dropped():
+    store = RollupStore()
+    store.add_sample('a', CAPTURED_AT + timedelta(seconds=61), 2.0, 180.0, 13)
+    store.add_sample('a', CAPTURED_AT, 9.0, 100.0, 10)
+
+    assert store.open_buckets[('a', '1m')]['high'] == 2.0
+    assert store.pending() == 0
+
+def test_evict_stale_closes_only_finished_buckets():
+    store = RollupStore()
+    store.add_sample('a', CAPTURED_AT, 1.0, 100.0, 10)
+
+    store.evict_stale(CAPTURED_AT + timedelta(minutes=5))
+
+    assert sorted(b['resolution'] for b in store.closed_buckets) == ['1m', '5m']
+    assert list(store.open_buckets) == [('a', '1h')]
+
+def test_flush_waits_for_a_full_batch_or_the_interval(written):
+    store = RollupStore(batch_size=2, flush_seconds=3600)
+    store.add_sample('a', CAPTURED_AT, 1.0, 100.0, 10)
+    store.evict_stale(CAPTURED_AT + timedelta(minutes=1))
+
+    assert store.flush(FakeConnection()) == 0
+    assert written == []
+
+    store.add_sample('b', CAPTURED_AT, 1.0, 100.0, 10)
+    store.evict_stale(CAPTURED_AT + timedelta(minutes=1))
+
+    assert store.flush(FakeConnection()) == 2
+    assert store.pending() == 0
+
+def test_flush_writes_only_samples_added_since_the_last_write(written):
+    store = RollupStore()
+    store.add_sample('a', CAPTURED_AT, 1.0, 100.0, 10)
+    store.add_sample('a', CAPTURED_AT + timedelta(seconds=10), 2.0, 110.0, 11)
+    store.flush(FakeConnection(), include_open=True)
+
+    store.add_sample('a', CAPTURED_AT + timedelta(seconds=20), 3.0, 120.0, 12)
+    store.flush(FakeConnection(), include_open=True)
+
+    key = ('a', '1m', CAPTURED_AT)
+    assert samples_of(written[0][key]) == 2
+    assert samples_of(written[1][key]) == 1
+
+def test_flush_skips_buckets_without_new_samples(written):
+    store = RollupStore()
+    store.add_sample('a', CAPTURED_AT, 1.0, 100.0, 10)
+    store.flush(FakeConnection(), include_open=True)
+
+    assert store.flush(FakeConnection(), include_open=True) == 0
+    assert len(written) == 1
+
+def test_failed_flush_keeps_closed_buckets_for_the_next_attempt(written):
+    store = RollupStore()
+    store.add_sample('a', CAPTURED_AT, 1.0, 100.0, 10)
+    store.evict_stale(CAPTURED_AT + timedelta(minutes=1))
+
+    with pytest.raises(RuntimeError):
+        store.flush(FakeConnection(fail=True), force=True)
+    assert store.pending() == 1
+
+    assert store.flush(FakeConnection(), force=True) == 1
+    assert samples_of(written[0][('a', '1m', CAPTURED_AT)]) == 1
@@ -0,0 +1,108 @@
+import re
+from datetime import datetime, timedelta
+import numpy as np
+
+# Seconds per unit for gmgn age strings (e.g. '30s', '5m', '1h 5m', '1d')
+AGE_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+AGE_PATTERN = re.compile(r'(\d+)\s*([smhd])', re.IGNORECASE)
+EPOCH = datetime(1970, 1, 1)
+
+def epoch_seconds(timestamp):
+    """Seconds since the epoch for a naive UTC datetime"""
+    return (timestamp - EPOCH).total_seconds()
+
+def parse_ages(age_texts):
+    """Parse a whole snapshot of age strings at once.
+
+    The snapshot is scanned with a single regex pass over the joined text and
+    each (value, unit) match is accumulated into its row with NumPy, so no
+    per-row arrays are built.
+
+    Returns two float arrays: the displayed age in seconds and the resolution
+    of the display (the smallest unit shown). gmgn truncates ages, so the true
+    age lies in [age, age + resolution). Unparseable ages are NaN.
+    """
+    count = len(age_texts)
+    texts = [(text or '').replace('\n', ' ') for text in age_texts]
+    row_starts = np.cumsum([0] + [len(text) + 1 for text in texts[:-1]])
+
+    matches = [
+        (match.start(), int(match.group(1)), AGE_UNITS[match.group(2).lower()])
+        for match in AGE_PATTERN.finditer('\n'.join(texts))
+    ]
+    if not matches:
+        return np.full(count, np.nan), np.full(count, np.nan)
+
+    positions, values, units = (np.array(column, dtype=np.float64) for column in zip(*matches))
+    rows = np.searchsorted(row_starts, positions, side='right') - 1
+
+    ages = np.zeros(count)
+    resolutions = np.full(count, np.inf)
+    np.add.at(ages, rows, values * units)
+    np.minimum.at(resolutions, rows, units)
+
+    parsed = np.bincount(rows, minlength=count) > 0
+    ages[~parsed] = np.nan
+    resolutions[~parsed] = np.nan
+    return ages, resolutions
+
+def creation_bounds(age_texts, captured_at):
+    """Return (earliest, latest) creation times as epoch-second arrays.
+
+    Bounds are anchored to the capture timestamp of the snapshot rather than
+    to the time each row happens to be processed. captured_at is either one
+    datetime for the whole snapshot or one per row, for snapshots merged from
+    views captured at different times.
+    """
+    ages, resolutions = parse_ages(age_texts)
+    if isinstance(captured_at, datetime):
+        anchor = epoch_seconds(captured_at)
+    else:
+        anchor = np.array([epoch_seconds(timestamp) for timestamp in captured_at])
+    latest = anchor - ages
+    earliest = latest - resolutions
+    return earliest, latest
+
+class CreationTimeTracker:
+    """Keeps the narrowest creation-time window seen for every token.
+
+    Each observation bounds a token's creation time to an interval. Later
+    observations are intersected with the stored interval, so the estimate
+    tightens as the displayed age ticks over unit boundaries.
+    """
+
+    def __init__(self):
+        self.bounds = {}
+
+    def update(self, addresses, age_texts, captured_at):
+        """Fold a snapshot in and return {address: (estimate, error_seconds)}"""
+        earliest, latest = creation_bounds(age_texts, captured_at)
+        valid = np.isfinite(earliest) & np.array([bool(a) for a in addresses], dtype=bool)
+
+        known = np.array([self.bounds.get(a, (-np.inf, np.inf)) for a in addresses],
+                         dtype=np.float64).reshape(len(addresses), 2)
+        merged_earliest = np.maximum(known[:, 0], earliest)
+        merged_latest = np.minimum(known[:, 1], latest)
+
+        # Disjoint windows mean the old bound was wrong (e.g. clock jump), so restart
+        disjoint = merged_earliest > merged_latest
+        merged_earliest = np.where(disjoint, earliest, merged_earliest)
+        merged_latest = np.where(disjoint, latest, merged_latest)
+
+        estimates = (merged_earliest + merged_latest) / 2
+        errors = (merged_latest - merged_earliest) / 2
+
+        results = {}
+        for i in np.flatnonzero(valid):
+            address = addresses[i]
+            self.bounds[address] = (float(merged_earliest[i]), float(merged_latest[i]))
+            results[address] = (EPOCH + timedelta(seconds=float(estimates[i])), float(errors[i]))
+        return results
+
+    def prune(self, now, max_age_seconds=86400):
+        """Stop tracking tokens created more than max_age_seconds ago"""
+        cutoff = epoch_seconds(now) - max_age_seconds
+        stale = [address for address, (_, latest) in self.bounds.items() if latest < cutoff]
+        for address in stale:
+            del self.bounds[address]
+        return len(stale)
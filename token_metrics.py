@@ -0,0 +1,166 @@
+import re
+import numpy as np
+from token_ages import epoch_seconds
+
+# Suffix multipliers used by gmgn for abbreviated values (e.g. '$12.3K', '1.2M')
+NUMBER_SUFFIXES = {'': 1, 'K': 1e3, 'M': 1e6, 'B': 1e9}
+NUMBER_PATTERN = re.compile(r'(-?[\d,]*\.?\d+)\s*([KMB]?)', re.IGNORECASE)
+# Small prices are shown with a subscript zero count (e.g. '$0.0₄123' == 0.0000123)
+SUBSCRIPT_DIGITS = str.maketrans('₀₁₂₃₄₅₆₇₈₉', '0123456789')
+SUBSCRIPT_PATTERN = re.compile(r'0\.0([₀-₉]+)')
+
+def parse_gmgn_number(text):
+    """Parse a gmgn display value (e.g. '$12.3K', '1,234', '0.5M') into a float"""
+    if not text:
+        return np.nan
+
+    text = SUBSCRIPT_PATTERN.sub(
+        lambda m: '0.' + '0' * int(m.group(1).translate(SUBSCRIPT_DIGITS)), text)
+    match = NUMBER_PATTERN.search(text)
+    if not match:
+        return np.nan
+
+    try:
+        value = float(match.group(1).replace(',', ''))
+    except ValueError:
+        return np.nan
+
+    return value * NUMBER_SUFFIXES[match.group(2).upper()]
+
+class TokenMetricsStore:
+    """Fixed-size ring buffers of recent snapshots for every tracked token.
+
+    Each tracked token owns one row (slot) in a set of 2D arrays shaped
+    (max_tokens, window_size). Every snapshot is written into all rows at
+    once and the rolling stats are computed across all tokens with array
+    operations, so memory stays bounded at max_tokens * window_size samples.
+    """
+
+    def __init__(self, max_tokens=512, window_size=64, window_seconds=300):
+        self.max_tokens = max_tokens
+        self.window_size = window_size
+        self.window_seconds = window_seconds
+
+        shape = (max_tokens, window_size)
+        self.timestamps = np.full(shape, np.nan)
+        self.holders = np.full(shape, np.nan)
+        self.market_cap = np.full(shape, np.nan)
+        self.liquidity = np.full(shape, np.nan)
+
+        # Per-slot bookkeeping
+        self.head = np.zeros(max_tokens, dtype=np.int64)
+        self.peak_liquidity = np.full(max_tokens, np.nan)
+
+        self.slots = {}
+        self.free_slots = list(range(max_tokens - 1, -1, -1))
+
+    def _assign_slots(self, addresses):
+        """Return the slot index for each address, allocating new slots as needed"""
+        indices = []
+        for address in addresses:
+            slot = self.slots.get(address)
+            if slot is None:
+                if not self.free_slots:
+                    indices.append(-1)
+                    continue
+                slot = self.free_slots.pop()
+                self.slots[address] = slot
+            indices.append(slot)
+        return np.array(indices, dtype=np.int64)
+
+    def _clear_slots(self, indices):
+        """Reset the given slots so they can be reused by new tokens"""
+        self.timestamps[indices] = np.nan
+        self.holders[indices] = np.nan
+        self.market_cap[indices] = np.nan
+        self.liquidity[indices] = np.nan
+        self.head[indices] = 0
+        self.peak_liquidity[indices] = np.nan
+
+    def evict_missing(self, addresses):
+        """Drop every tracked token that is not in the given set of addresses"""
+        present = set(addresses)
+        gone = [address for address in self.slots if address not in present]
+        if not gone:
+            return 0
+
+        indices = np.array([self.slots.pop(address) for address in gone], dtype=np.int64)
+        self._clear_slots(indices)
+        self.free_slots.extend(indices.tolist())
+        return len(gone)
+
+    def update(self, records, captured_at):
+        """Add a snapshot of records and return rolling metrics per contract address"""
+        # Keep only the first occurrence of each address in this snapshot
+        seen = {}
+        for record in records:
+            address = record.get('contractAddress')
+            if address and address not in seen:
+                seen[address] = record
+
+        self.evict_missing(seen.keys())
+        if not seen:
+            return {}
+
+        addresses = list(seen.keys())
+        indices = self._assign_slots(addresses)
+        accepted = indices >= 0
+        if not accepted.all():
+            print(f"Metrics store full: skipping {int((~accepted).sum())} tokens")
+        addresses = [address for address, ok in zip(addresses, accepted) if ok]
+        indices = indices[accepted]
+        if len(indices) == 0:
+            return {}
+
+        holders = np.array([parse_gmgn_number(seen[a]['holders']) for a in addresses])
+        market_cap = np.array([parse_gmgn_number(seen[a]['marketCap']) for a in addresses])
+        liquidity = np.array([parse_gmgn_number(seen[a]['liquidity']) for a in addresses])
+        now = epoch_seconds(captured_at)
+
+        # Write the new samples into every token's ring buffer at once
+        positions = self.head[indices]
+        self.timestamps[indices, positions] = now
+        self.holders[indices, positions] = holders
+        self.market_cap[indices, positions] = market_cap
+        self.liquidity[indices, positions] = liquidity
+        self.head[indices] = (positions + 1) % self.window_size
+        self.peak_liquidity[indices] = np.fmax(self.peak_liquidity[indices], liquidity)
+
+        # Locate the oldest sample inside the rolling window for each token
+        timestamps = self.timestamps[indices]
+        in_window = timestamps >= now - self.window_seconds
+        oldest = np.where(in_window, timestamps, np.inf).argmin(axis=1)
+        rows = np.arange(len(indices))
+        elapsed_minutes = (now - timestamps[rows, oldest]) / 60.0
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            elapsed_minutes = np.where(elapsed_minutes > 0, elapsed_minutes, np.nan)
+            holder_growth = (holders - self.holders[indices, oldest]) / elapsed_minutes
+            market_cap_velocity = (market_cap - self.market_cap[indices, oldest]) / elapsed_minutes
+            peak = self.peak_liquidity[indices]
+            liquidity_drawdown = np.where(peak > 0, (peak - liquidity) / peak, np.nan)
+
+        metrics = {}
+        for i, address in enumerate(addresses):
+            metrics[address] = {
+                'holder_growth_per_min': _to_optional(holder_growth[i]),
+                'market_cap_velocity': _to_optional(market_cap_velocity[i]),
+                'liquidity_drawdown': _to_optional(liquidity_drawdown[i]),
+            }
+        return metrics
+
+    @property
+    def nbytes(self):
+        """Total memory held by the ring buffers and per-slot arrays"""
+        arrays = (self.timestamps, self.holders, self.market_cap, self.liquidity,
+                  self.head, self.peak_liquidity)
+        return sum(array.nbytes for array in arrays)
+
+    def report(self):
+        """Return a one-line summary of tracked tokens and memory usage"""
+        return (f"Metrics store: {len(self.slots)}/{self.max_tokens} tokens tracked, "
+                f"{self.nbytes / 1024:.1f} KiB")
+
+def _to_optional(value):
+    """Convert a NumPy float into a plain float, or None when it is not finite"""
+    return float(value) if np.isfinite(value) else None
@@ -0,0 +1,244 @@
+import sys
+import time
+from datetime import datetime, timedelta
+from psycopg2.extras import execute_values
+from token_metrics import parse_gmgn_number
+
+# Rollup resolutions and their bucket width in seconds
+RESOLUTIONS = {'1m': 60, '5m': 300, '1h': 3600}
+EPOCH = datetime(1970, 1, 1)
+
+# Re-applying a bucket merges it with what is already stored: samples carries
+# only the samples added since the bucket was last written, so flushing a
+# still-open bucket more than once, or continuing it after a restart, keeps
+# the count exact. gmgn's volume is cumulative, so the bucket stores the
+# values it opened and closed at rather than a per-bucket amount.
+UPSERT_ROLLUPS_SQL = '''
+INSERT INTO token_rollups (
+    contract_address,
+    resolution,
+    bucket_start,
+    open_price,
+    high_price,
+    low_price,
+    close_price,
+    volume_open,
+    volume_close,
+    holders_open,
+    holders_close,
+    samples
+) VALUES %s
+ON CONFLICT (contract_address, resolution, bucket_start) DO UPDATE SET
+    high_price = GREATEST(token_rollups.high_price, EXCLUDED.high_price),
+    low_price = LEAST(token_rollups.low_price, EXCLUDED.low_price),
+    close_price = EXCLUDED.close_price,
+    volume_close = EXCLUDED.volume_close,
+    holders_close = EXCLUDED.holders_close,
+    samples = token_rollups.samples + EXCLUDED.samples
+'''
+
+def bucket_start(timestamp, seconds):
+    """Return the start of the bucket of the given width containing timestamp"""
+    # Timestamps are naive UTC, so measure from the epoch directly
+    epoch = int((timestamp - EPOCH).total_seconds())
+    return EPOCH + timedelta(seconds=epoch - epoch % seconds)
+
+def _optional(value):
+    """Map NaN to None so it is stored as NULL"""
+    return None if value != value else value
+
+class RollupStore:
+    """Incrementally maintained OHLC, volume and holder rollups per token.
+
+    Open buckets live in memory and are updated from each snapshot. Buckets
+    that close are queued and written to token_rollups once a batch is full
+    or flush_seconds have passed since the last write.
+    """
+
+    def __init__(self, batch_size=500, flush_seconds=300):
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.open_buckets = {}
+        self.closed_buckets = []
+        self.last_flush = time.monotonic()
+
+    def add_sample(self, contract_address, captured_at, price, volume, holders):
+        """Fold one observation of a token into every resolution"""
+        if price != price:
+            return
+
+        for resolution, seconds in RESOLUTIONS.items():
+            start = bucket_start(captured_at, seconds)
+            key = (contract_address, resolution)
+            bucket = self.open_buckets.get(key)
+
+            if bucket is not None and bucket['bucket_start'] != start:
+                if start < bucket['bucket_start']:
+                    # Out-of-order sample for an already closed bucket
+                    continue
+                self.closed_buckets.append(bucket)
+                bucket = None
+
+            if bucket is None:
+                self.open_buckets[key] = {
+                    'contract_address': contract_address,
+                    'resolution': resolution,
+                    'bucket_start': start,
+                    'open': price,
+                    'high': price,
+                    'low': price,
+                    'close': price,
+                    'volume_open': volume,
+                    'volume_close': volume,
+                    'holders_open': holders,
+                    'holders_close': holders,
+                    'samples': 1,
+                    # Samples already written by an earlier flush of this bucket
+                    'flushed_samples': 0,
+                }
+            else:
+                bucket['high'] = max(bucket['high'], price)
+                bucket['low'] = min(bucket['low'], price)
+                bucket['close'] = price
+                bucket['volume_close'] = volume
+                bucket['holders_close'] = holders
+                bucket['samples'] += 1
+
+    def update(self, records, captured_at):
+        """Fold a full gmgn snapshot into the rollups"""
+        for record in records:
+            if not record.get('contractAddress'):
+                continue
+            self.add_sample(
+                record['contractAddress'],
+                captured_at,
+                parse_gmgn_number(record['price']),
+                parse_gmgn_number(record['volume']),
+                parse_gmgn_number(record['holders'])
+            )
+
+    def evict_stale(self, now):
+        """Close open buckets whose time range has already passed"""
+        for key, bucket in list(self.open_buckets.items()):
+            seconds = RESOLUTIONS[bucket['resolution']]
+            if bucket['bucket_start'] + timedelta(seconds=seconds) <= now:
+                self.closed_buckets.append(self.open_buckets.pop(key))
+
+    def pending(self):
+        """Number of closed buckets waiting to be written"""
+        return len(self.closed_buckets)
+
+    def flush(self, conn, include_open=False, force=False):
+        """Write queued buckets once a full batch is ready or the flush interval has passed.
+
+        force writes whatever is queued; include_open also writes the buckets
+        still being filled, which is safe because the upsert merges them and
+        each write only adds the samples not written before.
+        """
+        due = (len(self.closed_buckets) >= self.batch_size
+               or time.monotonic() - self.last_flush >= self.flush_seconds)
+        if not force and not include_open and not due:
+            return 0
+        self.last_flush = time.monotonic()
+
+        buckets = self.closed_buckets
+        if include_open:
+            buckets = buckets + list(self.open_buckets.values())
+        # A bucket with no new samples since its last write has nothing to add
+        buckets = [bucket for bucket in buckets if bucket['samples'] > bucket['flushed_samples']]
+        if not buckets:
+            self.closed_buckets = []
+            return 0
+
+        rows = [
+            (
+                bucket['contract_address'],
+                bucket['resolution'],
+                bucket['bucket_start'],
+                _optional(bucket['open']),
+                _optional(bucket['high']),
+                _optional(bucket['low']),
+                _optional(bucket['close']),
+                _optional(bucket['volume_open']),
+                _optional(bucket['volume_close']),
+                _optional(bucket['holders_open']),
+                _optional(bucket['holders_close']),
+                bucket['samples'] - bucket['flushed_samples']
+            )
+            for bucket in buckets
+        ]
+
+        cursor = conn.cursor()
+        execute_values(cursor, UPSERT_ROLLUPS_SQL, rows, page_size=self.batch_size)
+        conn.commit()
+        for bucket in buckets:
+            bucket['flushed_samples'] = bucket['samples']
+        self.closed_buckets = []
+        return len(rows)
+
+def rebuild_rollups(conn, since=None, batch_size=5000):
+    """Recompute token_rollups from the stored snapshot history"""
+    store = RollupStore(batch_size=batch_size)
+
+    cursor = conn.cursor()
+    if since:
+        # Start at the beginning of the widest bucket so it is rebuilt whole
+        since = bucket_start(since, max(RESOLUTIONS.values()))
+        cursor.execute("DELETE FROM token_rollups WHERE bucket_start >= %s", (since,))
+    else:
+        cursor.execute("DELETE FROM token_rollups")
+    conn.commit()
+
+    # Stream the history through a server-side cursor to keep memory flat;
+    # withhold keeps it open across the batch commits below
+    history = conn.cursor(name='rollup_rebuild', withhold=True)
+    history.itersize = batch_size
+    if since:
+        history.execute('''
+        SELECT contract_address, captured_at, price, volume, holders
+        FROM pump_token_snapshots
+        WHERE captured_at >= %s
+        ORDER BY captured_at
+        ''', (since,))
+    else:
+        history.execute('''
+        SELECT contract_address, captured_at, price, volume, holders
+        FROM pump_token_snapshots
+        ORDER BY captured_at
+        ''')
+
+    samples = 0
+    written = 0
+    for contract_address, captured_at, price, volume, holders in history:
+        store.add_sample(
+            contract_address,
+            captured_at,
+            parse_gmgn_number(price),
+            parse_gmgn_number(volume),
+            parse_gmgn_number(holders)
+        )
+        samples += 1
+        if store.pending() >= batch_size:
+            written += store.flush(conn, force=True)
+
+    history.close()
+    written += store.flush(conn, include_open=True)
+    print(f"Rebuilt rollups from {samples} snapshots: {written} buckets written")
+    return written
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] != 'rebuild':
+        print("Usage: python token_rollups.py rebuild [YYYY-MM-DDTHH:MM:SS]")
+        return
+
+    from gmgn import setup_database
+
+    since = datetime.fromisoformat(sys.argv[2]) if len(sys.argv) > 2 else None
+    conn = setup_database()
+    try:
+        rebuild_rollups(conn, since)
+    finally:
+        conn.close()
+
+if __name__ == '__main__':
+    main()